@@ -1,37 +1,81 @@
 # Gets board state pictures.
+# Overlays are loaded on a BrowserPool of headless browsers, so several board states can load at once.
+# fetch(board_state) starts loading one and returns a concurrent.futures.Future for its image; board_cache holds every overlay so far.
+# board_cache keeps overlays PNG-encoded (tens of KB each rather than 1 MB decoded), so whole games' worth fit in memory and in the cache file.
+# Each state is only ever loading once: asking for a state that is already loading gives the same future (one fetch, many waiters).
+# status(board_state) says whether a state is pending, ready or failed, and overlay_for(board_state) gives the image to show for it now.
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
 import base64
 import asyncio
 import io
+import threading
+import time
 import numpy as np
 import cv2
 import datetime
 import pickle
+from contextlib import contextmanager
+from concurrent.futures import Future
 import os
+from .BrowserPool import BrowserPool
 
 class BoardFetcher:
     # The base URL for where Uni is running. 
     # TODO Change this to be Uni's web link once the board-overlay branch is merged.
     UNI_URL = "http://localhost:3000/uni"
-    LOAD_DELAY = 3 # How long it's expected to take to load a board overlay.
+    LOAD_TIMEOUT = 10 # How long (seconds) to wait for a board overlay before giving up on it.
+    POLL_INTERVAL = 0.05 # How often (seconds) to check whether the overlay has appeared.
     LOADING_IMAGE = "ExtraFiles/GamesPlane Logo/Loading Logo.png"
     FAILED_IMAGE = "ExtraFiles/GamesPlane Logo/Invalid Logo.png"
 
-    def __init__(self, name, variant):
+    # What status() says about a board state.
+    PENDING = "pending"  # Its overlay is loading (or waiting for a browser).
+    READY = "ready"      # Its overlay is in board_cache.
+    FAILED = "failed"    # It had no overlay, so it's shown with the failed logo. fetch() tries again.
+
+    # Priorities for fetch(). Overlays someone is waiting to see go before background prefetches.
+    PRIORITY_NOW = 0
+    PRIORITY_PREFETCH = 10
+
+    # uni_url replaces UNI_URL, e.g. to fetch from a local stand-in server (TestScripts/OverlayServer.py).
+    def __init__(self, name, variant, workers: int = 2, max_pending: int = None, uni_url: str = None):
         self.name = name
         self.variant = variant
 
-        self.base_url = f"{self.UNI_URL}/games/{self.name}/variants/{self.variant}"
+        self.base_url = f"{self.UNI_URL if uni_url is None else uni_url.rstrip('/')}/games/{self.name}/variants/{self.variant}"
 
-        # Create a Selenium driver for this game.
-        options = Options()
-        options.add_argument("--headless")
-        self.driver = webdriver.Chrome(options=options)
+        # Browser sessions for this game: up to `workers` overlays load at once, each on its own session.
+        self.pool = BrowserPool(self.make_driver, workers)
+
+        self.loading_image = cv2.imread(self.LOADING_IMAGE, cv2.IMREAD_UNCHANGED)
+        self.failed_image = cv2.imread(self.FAILED_IMAGE, cv2.IMREAD_UNCHANGED)
+
+        # Most fetches that may be pending at once. When the estimator flickers between states, the oldest fetch still waiting
+        # for a browser makes way for the new one; if every pending fetch is already loading, the new one isn't started.
+        self.max_pending = workers * 4 if max_pending is None else max_pending
+
+        # Pool workers update these as fetches finish, so changes go through the lock.
+        # It's reentrant because a fetch that finishes (or is cancelled) straight away runs its callback on the calling thread.
+        self.lock = threading.RLock()
+
+        # (caller's future, image or None to cancel it) for fetches that finished while the lock was held.
+        # Callers' callbacks (e.g. PrefetchScheduler's) may take their own locks, so futures are only resolved once it's released.
+        self.settled = []
+        self.held = threading.local()
+
+        # board_state -> (pool future, caller's future, priority) for every fetch in flight, oldest first.
+        self.in_flight = {}
+
+        # States whose overlay failed to load. They are shown with the failed logo but not written to the cache.
+        self.failed = set()
+
+        # (board_state, image) for the overlay decoded last. The page shows the same one every frame, so it's only decoded once.
+        self.decoded = (None, None)
 
         self.cache_route = f"{self.CACHE_BASE_ROUTE}/{self.name}_{self.variant}.pkl"
-        self.loaded = {}
         self.board_cache = self.get_cache()
 
     def url_for(self, board_state):
@@ -39,10 +83,16 @@ class BoardFetcher:
     
     CACHE_BASE_ROUTE = "./App/MovesCache/"
     # Write my current cache
+    # Failed states are left out, so a state that only timed out is fetched again next time.
+    # The file is replaced in one step, so a program stopped mid-write leaves the previous cache intact.
     def write_cache(self):
-        with open(self.cache_route, 'wb') as f:
-            pickle.dump(self.board_cache, f)
-            print(f"Dumped {len(self.board_cache)} cached board overlays for {self.name} to {self.cache_route}")
+        with self.lock:
+            finished = {state: image for state, image in self.board_cache.items() if state not in self.failed}
+        os.makedirs(os.path.dirname(self.cache_route), exist_ok=True)
+        with open(self.cache_route + ".tmp", 'wb') as f:
+            pickle.dump(finished, f)
+        os.replace(self.cache_route + ".tmp", self.cache_route)
+        print(f"Dumped {len(finished)} cached board overlays for {self.name} to {self.cache_route}")
 
     # Attempt to get my cache object from the MovesCache.
     # If it doesn't exist, create it.
@@ -50,6 +100,8 @@ class BoardFetcher:
         if os.path.exists(self.cache_route):
             with open(self.cache_route, 'rb') as f:
                 items = pickle.load(f)
+                # Caches written before overlays were kept encoded hold the images themselves.
+                items = {state: self.encode_overlay(item) if isinstance(item, np.ndarray) else item for state, item in items.items()}
                 print(f"Successfully loaded {len(items)} cached board overlays for {self.name} from {self.cache_route}")
                 return items
         else:
@@ -59,69 +111,216 @@ class BoardFetcher:
         
     # Erase the cache if there's incorrect data in it.
     def erase_cache(self):
-        self.board_cache = {}
+        with self.lock:
+            self.board_cache = {}
+            self.failed = set()
+            self.decoded = (None, None)
 
-    async def fetch_svg(self, board_state):
-        # Generate and save to cache.
+    # Starts one headless browser session. Each pool worker calls this for its own session.
+    @staticmethod
+    def make_driver():
+        options = Options()
+        options.add_argument("--headless")
+        return webdriver.Chrome(options=options)
+
+    # Returns the overlay image's data URL once the page has rendered it, or None if it isn't there yet.
+    # Only the one element is read through the driver; the rest of the page is never downloaded or parsed.
+    @staticmethod
+    def overlay_src(driver):
+        try:
+            src = driver.find_element(By.ID, "board-overlay").get_attribute("src")
+        except (NoSuchElementException, StaleElementReferenceException):
+            return None
+        return src if src is not None and src.startswith("data:image") else None
+
+    # Turns an overlay's data URL into a 512x512 image.
+    @staticmethod
+    def decode_overlay(data_url):
+        # Remove prefix info
+        _, encoded = data_url.split(',', 1)
+        image_data = base64.b64decode(encoded)
+
+        # Decode the image
+        image_np = np.frombuffer(image_data, dtype=np.uint8)
+        image_cv = cv2.imdecode(image_np, cv2.IMREAD_UNCHANGED)
+
+        # Check we successfully decoded the image
+        if image_cv is None:
+            raise ValueError("Failed to decode image.")
+
+        # Resize to 512x512
+        return cv2.resize(image_cv, (512, 512), interpolation=cv2.INTER_AREA)
+
+    # The PNG board_cache keeps an overlay as.
+    @staticmethod
+    def encode_overlay(image):
+        return cv2.imencode(".png", image)[1].tobytes()
+
+    # Returns a cached overlay as an image.
+    def cached_overlay(self, board_state):
+        state, image = self.decoded
+        if state != board_state:
+            image = cv2.imdecode(np.frombuffer(self.board_cache[board_state], dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+            self.decoded = (board_state, image)
+        return image
+
+    # Loads a board state's overlay page on driver and returns the decoded overlay. Runs on a pool worker.
+    def load_overlay(self, driver, board_state):
         url = self.url_for(board_state)
         print(f"Fetching a board overlay from {url}")
-        self.driver.get(url)
+        driver.get(url)
 
-        # Let the page load and JS run.
-        # TODO We should try to lower this as much as possible.
-        await asyncio.sleep(2.5)
+        # Wait for the page's JS to put the overlay in, checking every POLL_INTERVAL seconds.
+        # Most overlays appear within a few hundred ms; a state with no overlay gives up after LOAD_TIMEOUT.
+        deadline = time.monotonic() + self.LOAD_TIMEOUT
+        data_url = self.overlay_src(driver)
+        while data_url is None and time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            data_url = self.overlay_src(driver)
 
-        html = self.driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
+        if data_url is None:
+            raise TimeoutError(f"No overlay after {self.LOAD_TIMEOUT} seconds.")
+        return self.decode_overlay(data_url)
 
-        # Extract element by ID
-        try:
-            data_url = soup.find("img", id="board-overlay")["src"]
-
-            # Remove prefix info
-            _, encoded = data_url.split(',', 1)
-            image_data = base64.b64decode(encoded)
-
-            # Decode the image
-            image_np = np.frombuffer(image_data, dtype=np.uint8)
-            
-            image_cv = cv2.imdecode(image_np, cv2.IMREAD_UNCHANGED)
-            
-            # Check we successfully decoded the image
-            if image_cv is None:
-                raise ValueError("Failed to decode image.")
-            
-            # Resize to 512x512
-            image_cv = cv2.resize(image_cv, (512, 512), interpolation=cv2.INTER_AREA)
-
-            self.board_cache[board_state] = image_cv
-            self.loaded[board_state] = True
-        except:
-            print(f"Invalid board state {board_state} was queried.")
-            self.board_cache[board_state] = cv2.imread(self.FAILED_IMAGE, cv2.IMREAD_UNCHANGED) 
-            self.loaded[board_state] = True
+    # Holds the lock like `with self.lock:`, and resolves the futures of fetches that finished meanwhile once the outermost hold ends.
+    @contextmanager
+    def _locked(self):
+        with self.lock:
+            self.held.depth = getattr(self.held, "depth", 0) + 1
+            try:
+                yield
+            finally:
+                self.held.depth -= 1
+        if self.held.depth == 0:
+            self._settle()
+
+    def _settle(self):
+        with self.lock:
+            settled, self.settled = self.settled, []
+        for result, image in settled:
+            if image is None:
+                result.cancel()
+            else:
+                result.set_result(image)
+
+    # Returns PENDING, READY or FAILED for a board state, or None if it was never fetched.
+    def status(self, board_state):
+        with self.lock:
+            if board_state in self.in_flight:
+                return self.PENDING
+            if board_state in self.failed:
+                return self.FAILED
+            if board_state in self.board_cache:
+                return self.READY
+            return None
+
+    # Returns the image to show for a board state right now: its overlay, the failed logo, or the loading logo.
+    def overlay_for(self, board_state):
+        with self.lock:
+            if board_state in self.failed:
+                return self.failed_image
+            if board_state in self.board_cache:
+                return self.cached_overlay(board_state)
+            return self.loading_image
+
+    # Starts loading a board state's overlay on the browser pool. Returns immediately with a concurrent.futures.Future for the image.
+    # A state that is already loading gets the future of that fetch, and a READY state an already finished future.
+    # A state that fails to load gets the failed logo, and the future gives that.
+    # priority is PRIORITY_NOW or PRIORITY_PREFETCH; asking for a prefetch that is still waiting with PRIORITY_NOW moves it up.
+    # Returns None if max_pending fetches are already loading (or, for a prefetch, already pending).
+    def fetch(self, board_state, priority: int = PRIORITY_NOW):
+        with self._locked():
+            if board_state in self.in_flight:
+                job, result, queued_priority = self.in_flight[board_state]
+                if priority < queued_priority:
+                    # Swap the entry out first, so cancelling the old job doesn't cancel the caller's future with it.
+                    self.in_flight[board_state] = (None, result, priority)
+                    if job.cancel():
+                        self._submit(board_state, result, priority)
+                    else:
+                        self.in_flight[board_state] = (job, result, queued_priority)
+                return result
+            if board_state in self.board_cache and board_state not in self.failed:
+                ready = Future()
+                ready.set_result(self.cached_overlay(board_state))
+                return ready
+            if len(self.in_flight) >= self.max_pending:
+                # Prefetches never push out other fetches.
+                if priority >= self.PRIORITY_PREFETCH or not self._drop_waiting():
+                    return None
 
+            result = Future()
+            self._submit(board_state, result, priority)
+            return result
+
+    def _submit(self, board_state, result, priority):
+        job = self.pool.submit(self.load_overlay, board_state, priority=priority)
+        self.in_flight[board_state] = (job, result, priority)
+        job.add_done_callback(lambda done: self._finish(board_state, done))
+
+    # Cancels a fetch that is still waiting for a browser, e.g. a prefetch that is no longer needed.
+    # Returns True if it was cancelled; fetches already loading are left to finish.
+    def cancel(self, board_state):
+        with self._locked():
+            return board_state in self.in_flight and self.in_flight[board_state][0].cancel()
+
+    # Cancels one fetch that is still waiting for a browser: the oldest prefetch, or else the oldest fetch.
+    # Returns False if every pending fetch is already loading.
+    def _drop_waiting(self):
+        waiting = sorted(self.in_flight.values(), key=lambda entry: -entry[2])
+        for job, _, _ in waiting:
+            if job.cancel():
+                return True
+        return False
+
+    # Stores a finished load in the cache and passes the image on to the caller's future.
+    # The caller's future is resolved by _locked once nothing holds the lock, never from inside it.
+    def _finish(self, board_state, done):
+        with self._locked():
+            # A fetch moved up to a higher priority has a new job; the old one's cancellation is ignored.
+            entry = self.in_flight.get(board_state)
+            if entry is None or entry[0] is not done:
+                return
+            _, result, _ = self.in_flight.pop(board_state)
+            if done.cancelled():
+                self.settled.append((result, None))
+                return
+            try:
+                image = done.result()
+                self.board_cache[board_state] = self.encode_overlay(image)
+                self.failed.discard(board_state)
+            except Exception:
+                print(f"Invalid board state {board_state} was queried.")
+                image = self.failed_image
+                self.board_cache.pop(board_state, None)
+                self.failed.add(board_state)
+            self.settled.append((result, image))
+
+    # Loads a board state's overlay and returns it once it's ready.
+    # Returns the loading logo instead if too many fetches are pending to start this one.
+    async def fetch_svg(self, board_state):
+        future = self.fetch(board_state)
+        return self.loading_image if future is None else await asyncio.wrap_future(future)
+
+    # Returns a board state's overlay from the cache, or loads it first.
     async def get_svg_for(self, board_state):
         # Check the cache.
-        if board_state in self.board_cache:
-            return self.board_cache[board_state]
-
-        self.board_cache[board_state] = cv2.imread(self.LOADING_IMAGE, cv2.IMREAD_UNCHANGED)   # Default to loading logo.
-        self.loaded[board_state] = False
+        if self.status(board_state) in (self.READY, self.FAILED):
+            return self.overlay_for(board_state)
 
-        # Begin trying to load the web picture.
-        await self.fetch_svg(board_state)
+        # Begin trying to load the web picture (or wait for the fetch already loading it).
+        return await self.fetch_svg(board_state)
 
     # To be called before a program ends. Closes the selenium session and writes to cache.
     def close(self):
-        self.driver.quit()
+        self.pool.close()
         self.write_cache()
         print("Quit Selenium and wrote cache.")
 
     # Debug function to check what a board state's image looks like.
     def show(self, board_state):
         if board_state in self.board_cache:
-            cv2.imshow(f"{self.name} : {board_state}", self.board_cache[board_state])
+            cv2.imshow(f"{self.name} : {board_state}", self.cached_overlay(board_state))
             # Get the current date and time
         else:
             print(f"{datetime.datetime.now()} : Tried to show {board_state} which wasn't in cache. {self.board_cache}")
\ No newline at end of file
@@ -0,0 +1,99 @@
+# A BrowserPool runs jobs on a fixed number of headless browser sessions.
+# A Selenium driver must only be used by one thread at a time, so each session belongs to exactly one worker thread and never leaves it.
+# Jobs wait in a queue and go to whichever worker is free, so up to `size` pages load in parallel without racing on a driver.
+# Waiting jobs are handed out lowest priority value first (then oldest first), so urgent jobs skip ahead of background ones.
+# To use it:
+#   pool = BrowserPool(make_driver, size=3)
+#   future = pool.submit(job, arg)    # job(driver, arg) runs on a worker; future is a concurrent.futures.Future
+#   result = future.result()          # or: await asyncio.wrap_future(future)
+#   pool.close()
+
+import queue
+import threading
+import itertools
+from concurrent.futures import Future
+from selenium.common.exceptions import WebDriverException
+
+class BrowserPool:
+    def __init__(self, make_driver, size: int = 2):
+        if size < 1:
+            raise Exception("BrowserPool: size must be at least 1.")
+
+        # Called on a worker thread to start that worker's browser session.
+        self.make_driver = make_driver
+        self.size = size
+
+        # Jobs waiting for a worker: (priority, order, future, job, args). A None future tells a worker to stop.
+        self.jobs = queue.PriorityQueue()
+        self.order = itertools.count()
+        self.closed = False
+
+        self.workers = [threading.Thread(target=self._work, name=f"BrowserPool-{i}", daemon=True) for i in range(size)]
+        for worker in self.workers:
+            worker.start()
+
+    # Queues job(driver, *args) and returns a Future for its result. Jobs with a lower priority value start first.
+    def submit(self, job, *args, priority: int = 0):
+        if self.closed:
+            raise Exception("BrowserPool: The pool is closed.")
+        future = Future()
+        self.jobs.put((priority, next(self.order), future, job, args))
+        return future
+
+    # How many jobs are waiting for a worker.
+    def waiting(self):
+        return self.jobs.qsize()
+
+    def _work(self):
+        # Each worker starts its browser on its first job, so an idle pool costs nothing.
+        driver = None
+        try:
+            while True:
+                _, _, future, job, args = self.jobs.get()
+                if future is None:
+                    break
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    if driver is None:
+                        driver = self.make_driver()
+                    future.set_result(job(driver, *args))
+                except WebDriverException as e:
+                    # The session itself broke (e.g. the browser crashed); the next job gets a fresh one.
+                    future.set_exception(e)
+                    driver = self._quit(driver)
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        if driver is not None:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+        return None
+
+    # Stops every worker and closes its browser. Jobs still waiting are cancelled; jobs already running finish first.
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                item = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if item[2] is not None:
+                item[2].cancel()
+        for _ in self.workers:
+            self.jobs.put((float("inf"), next(self.order), None, None, None))
+        for worker in self.workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
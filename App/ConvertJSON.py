@@ -9,7 +9,9 @@ def build_arucos(aruco_data: list):
     return [PhysicalAruco(v["id"], v["tag"], v["size"], v["anchored"], v["position"]) for v in aruco_data]
     
 # Given a path to a json game representation, return the resulting python object.
-def fetch_game(game_name: str, camera_yaml: str = r"CameraCalibration\good_calibration.yaml"):
+# camera_yaml can also be an already parsed Calibration (see Helpers/Calibration.py).
+# frame_options, if given, are GamesFrame settings applied on top of the ones saved with the game.
+def fetch_game(game_name: str, camera_yaml: str = r"CameraCalibration\good_calibration.yaml", frame_options: dict = None):
     json_path = r'.\App\ProjectData' + "\\" + game_name + ".json"
     with open(json_path, "r") as file:
         data = json.load(file)
@@ -23,7 +25,8 @@ def fetch_game(game_name: str, camera_yaml: str = r"CameraCalibration\good_calib
         unanchored,
         data["valid_positions"],
         data["cm_to_space"],
-        camera_yaml
+        camera_yaml,
+        {**data.get("frame_options", {}), **(frame_options or {})}
     )
 
 def dictify_aruco(aruco_object: PhysicalAruco):
@@ -44,6 +47,8 @@ def write_game(gpg: GamesPlaneGame, path: str = None):
     to_write["aruco_unanchored"] = [dictify_aruco(aru) for aru in gpg.board_info.unanchored_arucos]
     to_write["valid_positions"] = gpg.board_info.valid_board_positions
     to_write["cm_to_space"] = gpg.board_info.cm_to_space
+    if gpg.frame_options:
+        to_write["frame_options"] = gpg.frame_options
 
     if path is None:
         path = gpg.name + ".json"
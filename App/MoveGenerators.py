@@ -0,0 +1,181 @@
+# A MoveGenerator knows a game's rules well enough to list every board state one move away from a given one.
+# States are UWAPI strings in the same format the game's UwapiConverter produces, e.g. "1_" + one character per cell for Dao,
+# so a successor can be handed straight to a BoardFetcher. PrefetchScheduler uses these to warm the overlay cache
+# with the positions the players can reach next.
+# Only Dao has a UwapiConverter so far; the other games use the same layout ("1_" or "2_" for whose turn it is, then the cells row by row)
+# and will need their converters to match.
+
+class MoveGenerator:
+    # The positions a game can start from.
+    @classmethod
+    def start_states(cls) -> list[str]:
+        return []
+
+    # Every state one move away from board_state, with the turn passed on. Empty if the game is over.
+    @classmethod
+    def next_states(cls, board_state: str) -> list[str]:
+        return []
+
+    # Splits "1_XO--..." into ("1", "XO--...").
+    @staticmethod
+    def split(board_state: str):
+        turn, _, cells = board_state.partition("_")
+        return turn, cells
+
+    @staticmethod
+    def other(turn: str):
+        return "2" if turn == "1" else "1"
+
+# "1_" is White (O) to move and "2_" is Black (X), like DaoConverter. Cells are row by row from the top left of the 4x4 board.
+class DaoMoves(MoveGenerator):
+    SIZE = 4
+    PIECES = {"1": "O", "2": "X"}
+    DIRECTIONS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+
+    @classmethod
+    def start_states(cls):
+        cells = ["-"] * cls.SIZE ** 2
+        for i in range(cls.SIZE):
+            cells[i * cls.SIZE + i] = "O"
+            cells[i * cls.SIZE + cls.SIZE - 1 - i] = "X"
+        return ["1_" + "".join(cells), "2_" + "".join(cells)]
+
+    # Four in a row or column, a 2x2 square, or all four corners.
+    @classmethod
+    def winner(cls, cells: str):
+        n = cls.SIZE
+        lines = [[y * n + x for x in range(n)] for y in range(n)]
+        lines += [[y * n + x for y in range(n)] for x in range(n)]
+        lines += [[y * n + x, y * n + x + 1, (y + 1) * n + x, (y + 1) * n + x + 1] for y in range(n - 1) for x in range(n - 1)]
+        lines.append([0, n - 1, n * (n - 1), n * n - 1])
+        for line in lines:
+            if cells[line[0]] != "-" and all(cells[i] == cells[line[0]] for i in line):
+                return cells[line[0]]
+        return None
+
+    # A piece slides any number of empty cells in one of 8 directions and must go as far as it can.
+    @classmethod
+    def next_states(cls, board_state):
+        turn, cells = cls.split(board_state)
+        if len(cells) != cls.SIZE ** 2 or turn not in cls.PIECES or cls.winner(cells) is not None:
+            return []
+
+        n = cls.SIZE
+        piece = cls.PIECES[turn]
+        states = []
+        for start in range(n * n):
+            if cells[start] != piece:
+                continue
+            x, y = start % n, start // n
+            for dx, dy in cls.DIRECTIONS:
+                end_x, end_y = x, y
+                while 0 <= end_x + dx < n and 0 <= end_y + dy < n and cells[(end_y + dy) * n + end_x + dx] == "-":
+                    end_x, end_y = end_x + dx, end_y + dy
+                if (end_x, end_y) == (x, y):
+                    continue
+                board = list(cells)
+                board[start] = "-"
+                board[end_y * n + end_x] = piece
+                states.append(cls.other(turn) + "_" + "".join(board))
+        return states
+
+# "1_" is x to move and "2_" is o. Cells are row by row from the top left, matching (0,0)..(2,2) in ProjectData.
+class TicTacToeMoves(MoveGenerator):
+    PIECES = {"1": "x", "2": "o"}
+    LINES = [[0, 1, 2], [3, 4, 5], [6, 7, 8], [0, 3, 6], [1, 4, 7], [2, 5, 8], [0, 4, 8], [2, 4, 6]]
+
+    @classmethod
+    def start_states(cls):
+        return ["1_" + "-" * 9]
+
+    @classmethod
+    def winner(cls, cells: str):
+        for a, b, c in cls.LINES:
+            if cells[a] != "-" and cells[a] == cells[b] == cells[c]:
+                return cells[a]
+        return None
+
+    @classmethod
+    def next_states(cls, board_state):
+        turn, cells = cls.split(board_state)
+        if len(cells) != 9 or turn not in cls.PIECES or cls.winner(cells) is not None:
+            return []
+        piece = cls.PIECES[turn]
+        return [cls.other(turn) + "_" + cells[:i] + piece + cells[i + 1:] for i in range(9) if cells[i] == "-"]
+
+# "1_" is X to move and "2_" is O. Cells are the 5 points in the order top left, top right, bottom right, bottom left, centre.
+# A piece moves along a line to the neighbouring empty point; a player who can't move loses.
+class PongHauKiMoves(MoveGenerator):
+    PIECES = {"1": "X", "2": "O"}
+    TL, TR, BR, BL, C = range(5)
+    # Every corner joins the centre; the sides join except across the top, which the board leaves open.
+    EDGES = [(TL, C), (TR, C), (BR, C), (BL, C), (TL, BL), (TR, BR), (BR, BL)]
+
+    @classmethod
+    def start_states(cls):
+        return ["1_XXOO-"]
+
+    @classmethod
+    def next_states(cls, board_state):
+        turn, cells = cls.split(board_state)
+        if len(cells) != 5 or turn not in cls.PIECES:
+            return []
+        piece = cls.PIECES[turn]
+        states = []
+        for a, b in cls.EDGES:
+            for start, end in ((a, b), (b, a)):
+                if cells[start] == piece and cells[end] == "-":
+                    board = list(cells)
+                    board[start], board[end] = "-", piece
+                    states.append(cls.other(turn) + "_" + "".join(board))
+        return states
+
+# "1_" is X to move and "2_" is O. Cells are the 3x3 board row by row from the top left.
+# X's cars start down the left edge and drive east, north or south, leaving off the east edge;
+# O's start along the bottom and drive north, east or west, leaving off the north edge.
+# Leaving the board takes a move, and the first player with every car off (or whose opponent can't move) wins.
+class DodgemMoves(MoveGenerator):
+    SIZE = 3
+    PIECES = {"1": "X", "2": "O"}
+    # (dx, dy) with y growing downwards.
+    DIRECTIONS = {"X": [(1, 0), (0, -1), (0, 1)], "O": [(0, -1), (1, 0), (-1, 0)]}
+    EXIT = {"X": (1, 0), "O": (0, -1)}
+
+    @classmethod
+    def start_states(cls):
+        return ["1_" + "X--" + "X--" + "-OO"]
+
+    @classmethod
+    def next_states(cls, board_state):
+        turn, cells = cls.split(board_state)
+        n = cls.SIZE
+        if len(cells) != n * n or turn not in cls.PIECES or "X" not in cells or "O" not in cells:
+            return []
+
+        piece = cls.PIECES[turn]
+        states = []
+        for start in range(n * n):
+            if cells[start] != piece:
+                continue
+            x, y = start % n, start // n
+            for dx, dy in cls.DIRECTIONS[piece]:
+                end_x, end_y = x + dx, y + dy
+                inside = 0 <= end_x < n and 0 <= end_y < n
+                if not inside and (dx, dy) != cls.EXIT[piece]:
+                    continue
+                if inside and cells[end_y * n + end_x] != "-":
+                    continue
+                board = list(cells)
+                board[start] = "-"
+                if inside:
+                    board[end_y * n + end_x] = piece
+                states.append(cls.other(turn) + "_" + "".join(board))
+        return states
+
+# Game name (as in the app's game list) -> its MoveGenerator.
+MOVE_GENERATORS = {
+    "Dao": DaoMoves,
+    "Tic Tac Toe": TicTacToeMoves,
+    "Pong Hau K'i": PongHauKiMoves,
+    "Dodgem": DodgemMoves,
+}
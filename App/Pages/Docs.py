@@ -142,6 +142,18 @@ with st.expander("DigitalAruco"):
 
     ---
 
+    ### `to_board_positions(pieces, anchor_markers, board, give_reasoning=False) -> Optional[List[List[str]]]`
+    Static. Estimates the board position of every piece at once, converting each anchor's rotation only once per call.
+    `to_board_position` uses this internally, and `GamesFrame` calls it once per frame.
+
+    #### Parameters
+    - `pieces` (`List[DigitalAruco]`): The unanchored markers to locate.
+    - `anchor_markers` (`List[DigitalAruco]`): Anchored reference markers.
+    - `board` (`PhysicalBoardInfo`): Board metadata.
+    - `give_reasoning` (`bool`, optional): If `True`, returns the reasoning for each piece.
+
+    ---
+
     ### `change_basis(rvec1, tvec1, rvec2, tvec2) -> Tuple[np.ndarray, np.ndarray]`
     Transforms a vector pair from one reference frame to another.
 
@@ -246,6 +258,14 @@ with st.expander("PhysicalBoardInfo"):
 
     * `id` (`int`): The ArUco ID to look up.
 
+    Lookups use a table indexed by ID (`aruco_by_id`), built when the board is created.
+
+    ---
+
+    ### `split_ids(ids) -> Tuple[np.ndarray, np.ndarray]`
+
+    Given the `ids` array from a detection, returns the indices of the anchors and of the pieces within it. IDs that are not part of this board are left out of both.
+
     ---
 
     ### `closest_valid_space(board_position) -> Tuple[float, float]`
@@ -256,6 +276,82 @@ with st.expander("PhysicalBoardInfo"):
 
     * `board_position` (`Tuple[float, float]`): The closest valid board position.
 
+    Lookups use a `PositionIndex` built when the board is created: regular square or hex layouts snap in constant time, and irregular layouts use a KD-tree.
+
+    ---
+
+    ### `closest_valid_spaces(board_positions) -> List[Tuple[float, float]]`
+
+    Batch version of `closest_valid_space`. Snaps every given board position in one call.
+
+    """)
+
+with st.expander("Calibration"):
+    st.markdown("""
+    # Classes: `Calibration`, `CalibrationRegistry`
+
+    ## Overview
+    A `Calibration` holds a camera's parsed camera matrix and distortion coefficients, and the frame size they were measured at.
+    The shared `CalibrationRegistry`, `calibrations`, keeps them by camera and resolution. Each `.yaml` is only parsed once, and a resolution that was never calibrated is rescaled from the camera's calibration.
+    Pass a `Calibration` anywhere a camera yaml is expected (`GamesFrame`, games, `fetch_game`, `process_video`).
+
+    ## Import
+    ```python
+    from Helpers.Calibration import Calibration, calibrations
+    ```
+
+    ## Example
+
+    ```python
+    calibrations.register("table-3", "CameraCalibration/table3.yaml")
+    game = fetch_game("Dao", calibrations.get("table-3", 1280, 720))
+    ```
+
+    ## Methods
+
+    ### `calibrations.register(camera, source, size=None) -> Calibration`
+
+    Records a calibration for `camera` (any name). `source` is a `Calibration`, a `.yaml` path or YAML data. `size` (`(width, height)`) is needed if the YAML has no `image_size`.
+
+    ### `calibrations.get(camera, width, height) -> Calibration`
+
+    Returns the camera's calibration for that resolution. Unregistered resolutions are rescaled from the closest registered one with the same aspect ratio; a camera with no calibration at all gets a guess with no distortion. Results are kept for later calls.
+
+    ### `calibrations.for_capture(camera, capture) -> Calibration`
+
+    Same as `get`, using the frame size of a `cv2.VideoCapture`.
+
+    ### `calibrations.parse(source) -> Calibration`
+
+    Parses a `.yaml` path or YAML data, or returns the result from the first time it was parsed. An edited file is parsed again.
+
+    ### `Calibration.scaled_to(width, height) -> Calibration`
+
+    Returns the calibration for frames resized to `width` x `height`. Only the camera matrix changes. Raises an exception if `width` x `height` doesn't have the same aspect ratio as the calibration.
+    """)
+
+with st.expander("FrameSource"):
+    st.markdown("""
+    # Module: `FrameSource`
+
+    ## Overview
+    Frame sources are where frames come from. Every source reads like a `cv2.VideoCapture` (`read()`, `get()`, `isOpened()`, `release()`), and also has `read_timestamped()` and `size`. They work anywhere a capture does, including `FrameGrabber` and `calibrations.for_capture`.
+
+    * `CameraSource(device=0, width=None, height=None, fourcc=None, fps=None, buffer_size=1, backend=None)`: A live camera. The backend defaults to V4L2 on Linux and DirectShow on Windows. The pixel format is set before the resolution, since V4L2 only offers some resolutions in some formats (e.g. `"MJPG"` for 1080p at 30fps). `buffer_size` is how many frames the driver may queue; each one is a frame of latency. The settings the camera actually granted are kept on the source (`print(source)` shows them).
+    * `VideoFileSource(path, loop=False)`: A recorded video.
+    * `ImageDirectorySource(path, loop=False, recursive=False, fps=1.0)`: Every image in a folder, such as `TestGraphics/TicTacToe`, in name order.
+    * `SyntheticSource(board_info, size=(1280, 720), frames=None, ...)`: Renders the board and its pieces with sensor noise and a slowly drifting camera, for trying things out without a camera. `move_every` moves a piece every that many frames. The frames match the calibration `calibrations` guesses for `size`.
+
+    ## Import
+    ```python
+    from Helpers.FrameSource import open_source
+    ```
+
+    ## Methods
+
+    ### `open_source(description="LIVE", **options) -> FrameSource`
+
+    Opens a source from a description: `"LIVE"` (the first camera), a camera index (`"1"`), a device path (`"/dev/video2"`), a folder of images, `"synthetic"`, or a video file. `options` go to the source, e.g. `open_source("LIVE", width=1280, height=720, fourcc="MJPG")`.
     """)
 
 with st.expander("GamesFrame"):
@@ -273,13 +369,52 @@ with st.expander("GamesFrame"):
     ## Initialization
 
     ```python
-    GamesFrame(camera_yaml, board_info)
+    GamesFrame(camera_yaml, board_info, detector_preset="balanced", detector_overrides=None,
+               board_solver="fused", max_reprojection_error=None,
+               tracking=False, tracking_margin=1.0, full_scan_interval=30,
+               pose_cache=False, pose_refresh_interval=10, pose_refresh_error=2.0, pose_smoothing=0.5, pose_max_age=90,
+               detection_scale=1.0, game_dictionary=True,
+               motion_gate=False, motion_threshold=0.002, max_stale_frames=30,
+               optical_flow=False, flow_detect_interval=5,
+               reuse_threshold=None, undistort="none")
     ```
 
     ### Parameters
 
-    * `camera_yaml` (`str`): The `.yaml` file path or preloaded YAML data containing the camera’s intrinsic parameters.
+    * `camera_yaml` (`str` or `Calibration`): The camera’s intrinsic parameters: a `Calibration` from the calibration registry, or a `.yaml` file path or YAML data (parsed once by the registry). If the calibration knows its image size and frames arrive at a different size with the same aspect ratio, it is rescaled for them and everything carried over from earlier frames is reset. Frames with a different aspect ratio get the calibration unscaled, with a warning.
     * `board_info` (`PhysicalBoardInfo`): Information about the game’s board, including ArUco markers and valid positions.
+    * `detector_preset` (`str`, optional): One of `"fast"`, `"balanced"` or `"accurate"`. Trades marker recall for latency. See `Helpers/DetectorConfig.py`.
+    * `detector_overrides` (`dict`, optional): `aruco.DetectorParameters` settings applied on top of the preset, e.g. `{"minMarkerPerimeterRate": 0.02}`.
+    * `board_solver` (`str`, optional): `"fused"` solves one board pose per frame from every visible anchor's corners and maps each piece through it. `"anchors"` re-bases each piece on each anchor and averages the estimates.
+    * `max_reprojection_error` (`float`, optional): With the `"fused"` solver, frames whose board pose misses the detected anchor corners by more than this many pixels (RMS) are rejected: no pieces are returned for them.
+    * `tracking` (`bool`, optional): If `True`, once the anchors are found, later frames are only searched inside the board's region from the previous frame. The whole frame is still scanned every `full_scan_interval` frames, and straight away if any anchor goes missing. Pieces taken off the board are only picked up again by a full scan.
+    * `tracking_margin` (`float`, optional): How many board units around the board are still searched when tracking.
+    * `full_scan_interval` (`int`, optional): How many frames tracking may go without a full-frame scan.
+    * `pose_cache` (`bool`, optional): If `True` (needs the `"fused"` solver), the board pose is kept between frames. It is only solved again from the anchors every `pose_refresh_interval` frames, or when it misses the visible anchors by more than `pose_refresh_error` pixels. While it is reused, the anchors' own poses come from it instead of being estimated.
+    * `pose_smoothing` (`float`, optional): Weight (0 to 1) of a freshly solved pose when it is blended into the cached one. `1` turns smoothing off.
+    * `pose_max_age` (`int`, optional): With `pose_cache`, how many frames pieces keep being located from the cached pose while every anchor is hidden (e.g. by a player's arm).
+    * `detection_scale` (`float`, optional): Below `1`, markers are found on a copy of the frame shrunk by this factor, then each marker's corners are refined to sub-pixel accuracy at full resolution. Returned corners are always in the full frame's pixels, so the camera calibration stays the same. `0.5` on a 4K camera costs about as much as detecting at 1080p; very small markers may be missed at low scales.
+    * `game_dictionary` (`bool`, optional): If `True`, the detector's dictionary only holds the ids used by `board_info`. Markers from other games on the table are never identified, and each candidate is checked against a few codes instead of all 1024. Results always use the original ArUco ids.
+    * `motion_gate` (`bool`, optional): If `True`, each frame is first compared with the last processed one, using small grayscale thumbnails of the board's region. If less than `motion_threshold` of the region changed, the last result is returned again without running detection. A fresh frame is processed at least every `max_stale_frames` frames.
+    * `optical_flow` (`bool`, optional): If `True`, between full detections the last frame's marker corners are followed into the new frame with Lucas-Kanade optical flow, and the pose and board steps run on the tracked corners. Each track is checked (forward-backward flow error, convex corners in the same order, no sudden size change). The detector runs instead if any check fails, and always every `flow_detect_interval` frames. Markers that appear between detections are found at the next detection.
+    * `reuse_threshold` (`float`, optional): If set, each marker is matched to last frame's markers by id and then by nearest corners, since ids can repeat. A marker whose corners are all within this many pixels of where its pose was last estimated keeps that pose. If the board pose is also exactly the same (e.g. from `pose_cache`), it keeps its board position too. `FrameDetections.reused_from` says which markers were reused.
+    * `undistort` (`str`, optional): How lens distortion is handled. `"none"` passes the distortion coefficients to every pose estimate. `"points"` undistorts all marker corners in one batch and then estimates poses with zero distortion. `"maps"` remaps each whole frame through undistortion maps built once at the first frame's size, so detection sees straight edges; returned corners then belong to the undistorted image (see `undistort_image`). Which one is fastest depends on the camera; `TestScripts/BenchmarkUndistort.py` times all three on a recording.
+
+    Any of these extra settings can be given per game with a `"frame_options"` object in the game's `.json` file.
+
+    ## Attributes
+
+    | Attribute | Type | Description |
+    |----------|------|-------------|
+    | `calibration` | `Calibration` | The calibration in use, for the size of the last frame. `cam_matrix` and `dist_coeff` are its arrays. |
+    | `detector` | `aruco.ArucoDetector` | The detector, built once and reused for every frame. |
+    | `last_timings` | `Dict[str, float]` | Seconds spent in each stage (`detect`, `pose`, `board`, `total`, plus `gate` with `motion_gate`) of the last `process_image` call. |
+    | `board_pose` | `BoardPose` | The fused board pose of the last frame, including its `reprojection_error` in pixels. `None` if the frame had no anchors (and no usable cached pose). Its `cached` flag says whether it came from the pose cache, and `anchor_corners_to_image(anchor_infos, cam_matrix, dist_coeff)` projects anchor corners through it even when they are covered. |
+    | `frame_rejected` | `bool` | Whether the last frame was rejected by `max_reprojection_error`. |
+    | `last_tracked` | `bool` | Whether the last frame's corners came from optical flow instead of the detector. |
+    | `frame_skipped` | `bool` | Whether the last frame reused the previous result because the motion gate saw no change. |
+    | `last_full_scan` | `bool` | Whether the last frame was searched in full (always `True` without `tracking`). |
+    | `image_dist_coeff` | `np.ndarray` | Distortion coefficients of the images results are reported in: zero with `undistort="maps"`, otherwise the camera's. Use these to project points for drawing. |
 
     ## Methods
 
@@ -290,13 +425,24 @@ with st.expander("GamesFrame"):
     #### Parameters
 
     * `image` (`np.ndarray`): A NumPy array representing the image to analyze (from `cv2`).
-    * `give_reasoning` (`bool`, optional): If `True`, also returns a list of string explanations of the math used to arrive at the given conclusion.
+    * `give_reasoning` (`bool`, optional): If `True`, also returns a `FrameTrace` explaining the math used to arrive at the given conclusion. The trace stores raw numbers and is only turned into strings when you read it (`.render()`, `.lines()`, or iterate it for one list of strings per piece). Leave this off in live loops: with it off, no reasoning is recorded at all.
+    * `compact` (`bool`, optional): If `True`, returns a single `FrameDetections` instead (see below).
 
     #### Returns
 
     * `List[DigitalAruco]`: The detected unanchored pieces.
     * `List[DigitalAruco]`: The detected anchor markers.
-    * `List[str]` (optional): Explanations of the spatial calculations, if `give_reasoning=True`.
+    * `FrameTrace` (optional): Explanations of the spatial calculations, if `give_reasoning=True`. Otherwise `None`.
+
+    ### `undistort_image(image) -> np.ndarray`
+
+    Returns the image as the pipeline sees it: remapped through the undistortion maps with `undistort="maps"`, otherwise unchanged. With `"maps"`, draw results on this image, since that's where their corners are.
+
+    ### Compact results: `FrameDetections`
+
+    `process_image(image, compact=True)` returns a `FrameDetections` (`Helpers/FrameDetections.py`) that stores the whole frame in NumPy arrays, one row per marker, anchors first:
+    `ids`, `corners` (N, 4, 2), `anchored`, `rvecs`, `tvecs`, `exact_positions` (N, 2) and `closest_indices` (indices into `valid_board_positions`, -1 if unlocated).
+    No `DigitalAruco` objects are built unless you call `.pieces()` or `.anchors()`. Use this mode for long-running sessions and batch processing.
     """)
 
 with st.expander("BoardStateEstimator"):
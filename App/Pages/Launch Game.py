@@ -3,17 +3,24 @@
 import cv2
 import sys
 sys.path.append(".")
-import asyncio
 import numpy as np
 import streamlit as st
-import threading
 import keyboard
 from Games.DummyGameTTT import *
 from App.ConvertJSON import fetch_game
 from App.BoardFetcher import BoardFetcher
+from App.PrefetchScheduler import PrefetchScheduler
 from App.UwapiConverter import *
 from CameraCalibration.auto_calibration import *
 from Helpers.StateEstimator import MajorityEstimator
+from Helpers.FrameGrabber import FrameGrabber
+from Helpers.FrameSource import open_source
+
+# Which camera to use: "LIVE" for the first one, an index such as "1", or a device path such as "/dev/video2".
+# CAMERA_OPTIONS are capture settings (width, height, fourcc, fps, buffer_size, backend); see Helpers/FrameSource.py.
+# A one-frame driver buffer keeps frames from arriving several frames late.
+CAMERA = "LIVE"
+CAMERA_OPTIONS = {"buffer_size": 1}
 
 ### Add new games below.
 #
@@ -43,19 +50,18 @@ if "chosen_game" not in ses or ses.chosen_game == None:
 
 else:
     if "camera" not in ses:
-        ses.camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        yaml_str = get_calib_matrices(cam=ses.camera)
+        ses.camera = open_source(CAMERA, **CAMERA_OPTIONS)
+        calibration = calibrations.for_capture(CAMERA, ses.camera)
+
+        # Read frames on their own thread so processing always works on the newest one.
+        ses.grabber = FrameGrabber(ses.camera)
         
-        ses.game = fetch_game(ses.chosen_game, yaml_str)
+        ses.game = fetch_game(ses.chosen_game, calibration, {"pose_cache": True, "motion_gate": True})
         print(ses.chosen_game)
         ses.fetcher = BoardFetcher(NAME_TO_INFO[ses.chosen_game]["route"], "regular")
+        moves = NAME_TO_INFO[ses.chosen_game]["converter"].moves
+        ses.prefetcher = PrefetchScheduler(ses.fetcher, moves) if moves is not None else None
         print("Camera and Game loaded successfully.")
-        ses.cached_corners = {
-            12: (0, 0),
-            13: (0, 0),
-            14: (0, 0),
-            15: (0, 0)
-        }
         # STATE ESTIMATION
         ses.estimator = MajorityEstimator(max_frames=10)
 
@@ -171,13 +177,6 @@ else:
 
         return bg
 
-    # Wrapper to run the async function in a thread
-    def make_loop_for(func, state):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(func(state))
-        loop.close()
-
     def put_text_top_left(image, text, font_scale=1.0, 
                         text_color=(255, 255, 255), 
                         border_color=(0, 0, 0),
@@ -212,8 +211,15 @@ else:
         return image
 
     # 5. PROCESS VIDEO
+    if run:
+        ses.grabber.start()
+    else:
+        ses.grabber.stop()
+
     while run:
-        _, image = ses.camera.read()
+        ok, image, captured_at = ses.grabber.read_timestamped()
+        if not ok:
+            continue
 
         pieces, anchors, reasons = ses.game.process_image(image)
         anc_display.badge(f"{len(anchors)} anchors", color="red")
@@ -222,8 +228,8 @@ else:
         for info in pieces + anchors:
             info.put_bounds(image)
 
-        # 1. Ensure we have at least one anchor. If not, can't calculate positions.
-        if len(anchors) == 0:
+        # 1. Ensure we have a board pose, from at least one anchor now or cached from earlier frames. If not, can't calculate positions.
+        if ses.game.gframe.board_pose is None:
             # Show whose turn it is on the image.
             image = put_text_top_left(
                 image, 
@@ -257,36 +263,43 @@ else:
             continue
 
         # 3. Add board state to state estimator
-        ses.estimator.seen_board_state(board_str)
+        ses.estimator.seen_board_state(board_str, captured_at)
         
         if ses.estimator.has_state():
             best_board = ses.estimator.curr_board_state()    
 
             data2.badge(best_board)
 
+            # Which corner of each anchor (TL=0, TR=1, BR=2, BL=3) touches the playing area.
             corners_to_use = {
-                12: "top_r",
-                13: "bot_r",
-                14: "top_l",
-                15: "bot_l"
+                12: 1,
+                13: 2,
+                14: 0,
+                15: 3
             }
-            for a in anchors:
-                ses.cached_corners[a.phys.id] = getattr(a, corners_to_use[a.phys.id]) 
+
+            # Start loading this state's overlay if it never was. Asking again while it loads doesn't start another fetch
+            # (but moves it ahead of any prefetches), and until it's ready overlay_for gives the loading logo.
+            if ses.fetcher.status(best_board) not in (BoardFetcher.READY, BoardFetcher.FAILED):
+                ses.fetcher.fetch(best_board)
+
+            # Meanwhile, load the states one move away so the next overlay is ready when it's needed.
+            if ses.prefetcher is not None:
+                ses.prefetcher.update(best_board)
 
             # This is janky, but it lists the correct way to display the moves image.
-            if best_board in st.session_state.fetcher.board_cache:
-                correct_order = [
-                    12, 14, 15, 13
-                ]
-                
-                display_corners = [ses.cached_corners[n] for n in correct_order]
-
-                overlay_image = st.session_state.fetcher.board_cache[best_board]
-                image = warp_and_overlay(image, overlay_image, np.array(display_corners))
-            else:
-                # Start a thread to get this image.
-                thread = threading.Thread(target=make_loop_for, args=(ses.fetcher.get_svg_for, best_board))
-                thread.start()
+            correct_order = [
+                12, 14, 15, 13
+            ]
+
+            # Project the anchor corners through the board pose, so the overlay stays put even while an anchor is covered.
+            gframe = ses.game.gframe
+            anchor_infos = [gframe.board_info.aruco_by_id[n] for n in correct_order]
+            projected = gframe.board_pose.anchor_corners_to_image(anchor_infos, gframe.cam_matrix, gframe.image_dist_coeff)
+            display_corners = [projected[k][corners_to_use[n]] for k, n in enumerate(correct_order)]
+
+            overlay_image = ses.fetcher.overlay_for(best_board)
+            image = warp_and_overlay(image, overlay_image, np.array(display_corners))
 
         # Show whose turn it is on the image.
         image = put_text_top_left(
@@ -60,12 +60,13 @@ This probably means your camera is in use, or hasn't yet finished up from the la
 ##### My video feed doesn't appear on Launch Game
 Your camera is likely not being grabbed correctly because you have several cameras on your computer. Do this:
 1. Go to the file `LaunchGame.py` in `App/Pages`.
-2. Go to the line reading `ses.camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)` (around line 46)
+2. Go to the lines reading `CAMERA = "LIVE"` and `CAMERA_OPTIONS = {"buffer_size": 1}` (near the top)
 
-Now: Try changing the line to the following and rerun the page.
-- **If you have a newer camera:** `ses.camera = cv2.VideoCapture(0)`
-- **If you have two cameras:** `ses.camera = cv2.VideoCapture(1, cv2.CAP_DSHOW)`
-- **If you have two newer cameras:** `ses.camera = cv2.VideoCapture(1)`
+Now: Try changing them to the following and rerun the page.
+- **If you have a newer camera (Windows):** `CAMERA_OPTIONS = {"buffer_size": 1, "backend": cv2.CAP_ANY}`
+- **If you have two cameras:** `CAMERA = "1"`
+- **On Linux:** `CAMERA = "/dev/video0"` (or whichever `/dev/video` device is your camera)
+- **If the video is slow or low resolution:** add `"width": 1280, "height": 720, "fourcc": "MJPG"` to `CAMERA_OPTIONS`
 
 ##### No overlay is shown
 1. **Check if it's a winning state.** Winning states don't have a GamesmanUni overlay, so nothing shows.
@@ -75,8 +76,8 @@ may be set up wrong, or the camera may be out of focus.
 This happens when the web request fails.   
 **You might be on the wrong version of GamesmanUni -- you must be on the `ae/ar` branch.** It also can happen if the yarn server is too slow.  
 Try closing out of the Streamlit app, then GamesmanUni. Then restart GamesmanUni and Streamlit in that order.  
-If this happens consistently and you are on the `ae/ar` branch, try this: Go to `App/BoardFetcher.py` and go to the line reading `await asyncio.sleep(2.5)`. This gives
-GamesmanUni 2.5 seconds to find the overlay. Change out 2.5 for a larger number (maybe 5 seconds) to give GamesmanUni more time to create the overlay.
+If this happens consistently and you are on the `ae/ar` branch, try this: Go to `App/BoardFetcher.py` and go to the line reading `LOAD_TIMEOUT = 10`. This gives
+GamesmanUni 10 seconds to create the overlay. Change out 10 for a larger number (maybe 20 seconds) to give GamesmanUni more time to create the overlay.
 ##### The AR output isn't correct / shows the wrong moves
 1. **Check the turn.** It's possible you have the turn set wrong. Click the turn switch to change the turn.
 2. **Check the ArUcos are correct.** It's possible an ArUco is the wrong ID.
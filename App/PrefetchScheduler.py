@@ -0,0 +1,82 @@
+# A PrefetchScheduler warms a BoardFetcher's cache with the states one move away from the board on the table.
+# The next overlay anyone needs is almost always one of those, so loading them while the players think turns the wait
+# after each move into a cache hit. Prefetches go to the fetcher at PRIORITY_PREFETCH, so the overlay for the board that is
+# actually on the table always loads first, and prefetches for a position that has moved on are cancelled.
+# To use it:
+#   prefetcher = PrefetchScheduler(fetcher, DaoMoves)
+#   prefetcher.update(best_board)    # each time the estimator settles on a board state
+
+import threading
+from .BoardFetcher import BoardFetcher
+
+class PrefetchScheduler:
+    def __init__(self, fetcher: BoardFetcher, moves, max_prefetch: int = None):
+        self.fetcher = fetcher
+
+        # The game's MoveGenerator.
+        self.moves = moves
+
+        # Most prefetches loading at once. By default one browser is always left free for the state on the table.
+        self.max_prefetch = max(1, fetcher.pool.size - 1) if max_prefetch is None else max_prefetch
+
+        # The stable state the current prefetches are for, the successors still to start, and those started.
+        self.state = None
+        self.queued = []
+        self.started = set()
+
+        # Done-callbacks from pool workers start the next prefetch, so changes go through the lock.
+        self.lock = threading.RLock()
+
+    # Call with the board state on the table whenever the estimator gives one, from the same thread that calls fetcher.fetch().
+    # Stops prefetching for the previous state and starts on the states one move away from this one.
+    # If the state hasn't changed, it only starts prefetches that couldn't start before (because the fetcher was full).
+    def update(self, board_state):
+        with self.lock:
+            if board_state == self.state:
+                self._fill()
+                return
+            self.state = board_state
+
+            successors = self.moves.next_states(board_state) if board_state is not None else []
+            wanted = set(successors)
+            # Cleared first: cancelling a prefetch runs _done, which would otherwise start the old state's queue.
+            self.queued = []
+            for stale in self.started - wanted:
+                self.fetcher.cancel(stale)
+            self.started &= wanted
+            self.queued = [state for state in successors if state not in self.started and self.fetcher.status(state) is None]
+
+            self._fill()
+
+    # Starts queued prefetches until max_prefetch are loading.
+    def _fill(self):
+        with self.lock:
+            while len(self.queued) > 0 and self._loading() < self.max_prefetch:
+                state = self.queued.pop(0)
+                if self.fetcher.status(state) is not None:
+                    continue
+                future = self.fetcher.fetch(state, BoardFetcher.PRIORITY_PREFETCH)
+                if future is None:
+                    # The fetcher is full; try again when something finishes or on the next update.
+                    self.queued.insert(0, state)
+                    break
+                self.started.add(state)
+                future.add_done_callback(lambda _, state=state: self._done(state))
+
+    def _done(self, board_state):
+        with self.lock:
+            self.started.discard(board_state)
+            self._fill()
+
+    # How many prefetches are still loading.
+    def _loading(self):
+        return sum(1 for state in self.started if self.fetcher.status(state) == BoardFetcher.PENDING)
+
+    # Cancels every prefetch still waiting for a browser.
+    def stop(self):
+        with self.lock:
+            for state in self.started:
+                self.fetcher.cancel(state)
+            self.queued = []
+            self.started = set()
+            self.state = None
@@ -1,6 +1,10 @@
 from Helpers.DigitalAruco import DigitalAruco
+from App.MoveGenerators import MoveGenerator, DaoMoves
 
 class UwapiConverter:
+    # The game's MoveGenerator, for prefetching the states after the current one. None if the game has none.
+    moves: type[MoveGenerator] = None
+
     # Converts a representation of the current turn and the seen DigitalArucos into a UWAPI string.
     # Return "fail" to reject the board state.
     @classmethod
@@ -8,6 +12,8 @@ class UwapiConverter:
         return ""
 
 class DaoConverter(UwapiConverter):
+    moves = DaoMoves
+
     @classmethod
     def convert(cls, turn: str, pieces: list[DigitalAruco]) -> str:
         if len(pieces) != 8:
@@ -1,12 +1,14 @@
 import cv2
 import yaml
 import time
+from Helpers.Calibration import Calibration, calibrations
 
 def get_calib_matrices(w=None, h=None, cam=None):
     """
     Given either 1) width, height of camera frame
        or option 2) cam = cv2.VideoCapture object
-    Returns calibration matrices as a yaml string
+    Returns a guessed calibration (no distortion) as a yaml string
+    Use calibrations.get / calibrations.for_capture instead to get it already parsed
     """
     if cam is not None:
         _, image = cam.read()
@@ -15,20 +17,16 @@ def get_calib_matrices(w=None, h=None, cam=None):
             _, image = cam.read()
         h, w = image.shape[:2]
     
-    cx = w / 2
-    cy = h / 2
-    f_l = (w + h) / 2
-    
-    camera_matrix = [
-        [f_l, 0.0, cx],
-        [0.0, f_l, cy],
-        [0.0, 0.0, 1.0]
-    ]
-    calib_matrices = {
-        "camera_matrix": camera_matrix,
-        "dist_coeff": [[0, 0, 0, 0, 0]]
-    }
-    return yaml.dump(calib_matrices)
+    return Calibration.guess(w, h).to_yaml()
+
+def scale_camera_matrix(calib_yaml, scale):
+    """
+    Given a calibration yaml string and a scale factor s
+    Returns the calibration for frames resized by s*(x,y), as a yaml string
+    Only the camera matrix changes; distortion coefficients don't depend on resolution
+    (GamesFrame and the calibration registry rescale by themselves; this is for code that still passes yaml around)
+    """
+    return Calibration.from_yaml(calib_yaml).scaled(scale).to_yaml()
 
 def video_to_image(video_dir, image_dir, stride=1):
     """
@@ -11,7 +11,7 @@ PIECE_SIZE = 1.66   # cm
 GRID = 3            # 3x3
 
 class DummyGame(GamesPlaneGame):
-    def __init__(self, camera_yaml):
+    def __init__(self, camera_yaml, frame_options: dict = None):
         self.name = "TicTacToe"
 
         # Define the arucos for this GamesPlane.
@@ -44,11 +44,11 @@ class DummyGame(GamesPlaneGame):
         board_info = PhysicalBoardInfo(X_arucos + O_arucos, 
                         anchor_arucos, valid_board_pos, SPACE_SIZE)
 
-        # Set up the GamesFrame for the board.
-        self.gframe = GamesFrame(camera_yaml, board_info)
+        # Set up the GamesFrame for the board, with any extra settings (e.g. detection_scale).
+        self.gframe = GamesFrame(camera_yaml, board_info, **({} if frame_options is None else frame_options))
 
     # Shortcut to pass an image to the gframe.
-    def process_image(self, image, reason=True):
+    def process_image(self, image, reason=False):
         return self.gframe.process_image(image, reason)
     
     # DEBUG Helper for now. Returns a text-based representation of the board.
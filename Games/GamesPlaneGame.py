@@ -4,7 +4,7 @@ from Helpers.PhysicalAruco import *
 
 class GamesPlaneGame:
     def __init__(self, name: str, anchored_arucos: list[PhysicalAruco], unanchored_arucos: list[PhysicalAruco], 
-                 valid_positions: list[tuple[float, float]], cm_to_space: float, camera_yaml: str):
+                 valid_positions: list[tuple[float, float]], cm_to_space: float, camera_yaml: str, frame_options: dict = None):
         self.name = name
         self.board_info = PhysicalBoardInfo(
             unanchored_arucos,
@@ -13,11 +13,14 @@ class GamesPlaneGame:
             cm_to_space
         )
         self.camera_yaml = camera_yaml
-        self.gframe = GamesFrame(camera_yaml, self.board_info)
+
+        # Extra GamesFrame settings (e.g. detector_preset) from the game's config.
+        self.frame_options = {} if frame_options is None else frame_options
+        self.gframe = GamesFrame(camera_yaml, self.board_info, **self.frame_options)
         return
 
     # Shortcut to pass an image to the gframe.
-    def process_image(self, image, reason=True):
+    def process_image(self, image, reason=False):
         return self.gframe.process_image(image, reason)
     
     # DEBUG Helper for now. Returns a text-based representation of the board.
@@ -0,0 +1,68 @@
+# Vectorized math for turning marker poses into board positions.
+# Every function works on whole frames at once: A anchors and P pieces are stacked into arrays,
+# so the per-frame cost is a handful of NumPy operations instead of a Python loop per piece/anchor pair.
+
+import numpy as np
+
+# Converts (N, 3) Rodrigues rotation vectors into (N, 3, 3) rotation matrices.
+# Equivalent to calling cv2.Rodrigues on each row.
+def rotation_matrices(rvecs):
+    rvecs = np.asarray(rvecs, dtype=np.float64).reshape((-1, 3))
+    theta = np.linalg.norm(rvecs, axis=1)
+
+    # Unit rotation axes; a zero rotation gets an arbitrary axis since sin and 1 - cos vanish anyway.
+    safe_theta = np.where(theta > 1e-12, theta, 1.0)
+    axes = rvecs / safe_theta[:, None]
+    x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+    zero = np.zeros_like(x)
+
+    # Cross-product matrix of each axis.
+    cross = np.stack([
+        np.stack([zero, -z, y], axis=1),
+        np.stack([z, zero, -x], axis=1),
+        np.stack([-y, x, zero], axis=1),
+    ], axis=1)
+
+    sin = np.sin(theta)[:, None, None]
+    cos = np.cos(theta)[:, None, None]
+    outer = axes[:, :, None] * axes[:, None, :]
+    identity = np.eye(3)[None, :, :]
+
+    matrices = cos * identity + (1 - cos) * outer + sin * cross
+    matrices[theta <= 1e-12] = np.eye(3)
+    return matrices
+
+# Re-expresses every piece tvec in every anchor's frame.
+# anchor_rotations is (A, 3, 3), anchor_tvecs is (A, 3), piece_tvecs is (P, 3).
+# Returns (P, A, 3): entry [p, a] is piece p's offset from anchor a, in anchor a's axes.
+def rebase_on_anchors(anchor_rotations, anchor_tvecs, piece_tvecs):
+    offsets = piece_tvecs[:, None, :] - anchor_tvecs[None, :, :]
+    # R^T @ offset for every (piece, anchor) pair.
+    return np.einsum("aji,paj->pai", anchor_rotations, offsets)
+
+# Turns rebased offsets into one weighted board position per piece.
+# rebased is (P, A, 3) in cm, anchor_positions is (A, 2) in board units.
+# Returns (estimates, weights, positions): per-anchor estimates (P, A, 2), normalized weights (P, A), and averaged positions (P, 2).
+def weighted_board_positions(rebased, anchor_positions, cm_to_space):
+    estimates = rebased[:, :, :2] / cm_to_space + anchor_positions[None, :, :]
+
+    # Closer anchors count for more: weight 2^-distance.
+    # Shifting by each piece's nearest distance leaves the normalized weights unchanged but avoids underflow for far pieces.
+    distances = np.linalg.norm(rebased, axis=2)
+    weights = np.exp2(-(distances - distances.min(axis=1, keepdims=True)))
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    positions = np.einsum("pa,pak->pk", weights, estimates)
+    return estimates, weights, positions
+
+# Full per-anchor location pipeline: converts every anchor rotation once, re-bases every piece on every anchor, then averages.
+# Returns (rebased, estimates, weights, positions) as described above.
+def locate_from_anchors(anchor_rvecs, anchor_tvecs, anchor_positions, piece_tvecs, cm_to_space):
+    anchor_rotations = rotation_matrices(anchor_rvecs)
+    anchor_tvecs = np.asarray(anchor_tvecs, dtype=np.float64).reshape((-1, 3))
+    anchor_positions = np.asarray(anchor_positions, dtype=np.float64).reshape((-1, 2))
+    piece_tvecs = np.asarray(piece_tvecs, dtype=np.float64).reshape((-1, 3))
+
+    rebased = rebase_on_anchors(anchor_rotations, anchor_tvecs, piece_tvecs)
+    estimates, weights, positions = weighted_board_positions(rebased, anchor_positions, cm_to_space)
+    return rebased, estimates, weights, positions
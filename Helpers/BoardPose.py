@@ -0,0 +1,110 @@
+# A BoardPose is the board's position and rotation relative to the camera for a single frame.
+# It is solved once per frame from every visible anchor's corners, then used to place every piece.
+# This keeps the per-frame math at O(pieces + anchors) instead of O(pieces x anchors).
+
+import cv2
+import numpy as np
+
+class BoardPose:
+    def __init__(self, rvec, tvec, reprojection_error: float, anchor_ids: list[int], cm_to_space: float, cached: bool = False):
+        # Board-to-camera rotation (Rodrigues form) and translation, in cm.
+        self.rvec = np.asarray(rvec, dtype=np.float64).reshape(3)
+        self.tvec = np.asarray(tvec, dtype=np.float64).reshape(3)
+
+        # Cached rotation matrix, since every piece mapping needs it.
+        self.rotation, _ = cv2.Rodrigues(self.rvec)
+
+        # RMS distance in pixels between the detected anchor corners and where this pose puts them.
+        # Large values mean the anchors disagree (bad detection, warped board, motion blur...).
+        self.reprojection_error = reprojection_error
+
+        # Which anchors this pose was solved from.
+        self.anchor_ids = anchor_ids
+
+        # How many cm converts to one board unit.
+        self.cm_to_space = cm_to_space
+
+        # True if this pose was carried over from earlier frames rather than solved from this one.
+        self.cached = cached
+
+    # Returns the (4, 3) corners of an anchor in board-plane cm, in ArUco corner order (TL, TR, BR, BL).
+    # The board's axes are the anchors' axes: +x right and +y up, as seen on the printed board.
+    @staticmethod
+    def anchor_object_points(board_position, size: float, cm_to_space: float):
+        center_x = board_position[0] * cm_to_space
+        center_y = board_position[1] * cm_to_space
+        half = size / 2
+        return np.array([
+            [center_x - half, center_y + half, 0],
+            [center_x + half, center_y + half, 0],
+            [center_x + half, center_y - half, 0],
+            [center_x - half, center_y - half, 0],
+        ], dtype=np.float64)
+
+    # Stacks the object points of several anchors into one (4A, 3) array.
+    @staticmethod
+    def anchors_object_points(anchor_infos, cm_to_space: float):
+        return np.concatenate([BoardPose.anchor_object_points(info.board_position, info.size, cm_to_space) for info in anchor_infos])
+
+    # Solves one board pose from the corners of every visible anchor.
+    # anchor_corners is a list of (1, 4, 2) corner arrays and anchor_infos the matching PhysicalArucos.
+    # Returns None if the pose could not be solved.
+    @staticmethod
+    def solve(anchor_corners, anchor_infos, cm_to_space: float, cam_matrix, dist_coeff):
+        if len(anchor_infos) == 0:
+            return None
+
+        object_points = BoardPose.anchors_object_points(anchor_infos, cm_to_space)
+        image_points = np.asarray(anchor_corners, dtype=np.float64).reshape((-1, 2))
+
+        # All anchor corners lie on the board plane, which is what IPPE is built for.
+        ok, rvec, tvec = cv2.solvePnP(object_points, image_points, cam_matrix, dist_coeff, flags=cv2.SOLVEPNP_IPPE)
+        if not ok:
+            return None
+
+        projected, _ = cv2.projectPoints(object_points, rvec, tvec, cam_matrix, dist_coeff)
+        error = float(np.sqrt(np.mean(np.sum((projected.reshape((-1, 2)) - image_points) ** 2, axis=1))))
+
+        return BoardPose(rvec, tvec, error, [info.id for info in anchor_infos], cm_to_space)
+
+    # Maps (N, 3) camera-space tvecs (cm) onto the board plane.
+    # Returns (N, 2) board positions in board units.
+    def to_board(self, tvecs):
+        offsets = np.asarray(tvecs, dtype=np.float64).reshape((-1, 3)) - self.tvec
+        # R^T @ offset for every row.
+        board_cm = offsets @ self.rotation
+        return board_cm[:, :2] / self.cm_to_space
+
+    # Projects (N, 2) board positions (board units) into (N, 2) image pixels.
+    def to_image(self, board_positions, cam_matrix, dist_coeff):
+        board_positions = np.asarray(board_positions, dtype=np.float64).reshape((-1, 2))
+        object_points = np.zeros((len(board_positions), 3), dtype=np.float64)
+        object_points[:, :2] = board_positions * self.cm_to_space
+        projected, _ = cv2.projectPoints(object_points, self.rvec, self.tvec, cam_matrix, dist_coeff)
+        return projected.reshape((-1, 2))
+
+    # Projects every corner of each anchor through this pose. Returns (A, 4, 2) pixels in ArUco corner order.
+    # Works whether or not the anchors are visible, e.g. to draw on the board while a hand covers an anchor.
+    def anchor_corners_to_image(self, anchor_infos, cam_matrix, dist_coeff):
+        object_points = BoardPose.anchors_object_points(anchor_infos, self.cm_to_space)
+        projected, _ = cv2.projectPoints(object_points, self.rvec, self.tvec, cam_matrix, dist_coeff)
+        return projected.reshape((-1, 4, 2))
+
+    # RMS distance in pixels between detected anchor corners and where this pose puts them.
+    def reprojection_error_for(self, anchor_corners, anchor_infos, cam_matrix, dist_coeff):
+        projected = self.anchor_corners_to_image(anchor_infos, cam_matrix, dist_coeff).reshape((-1, 2))
+        image_points = np.asarray(anchor_corners, dtype=np.float64).reshape((-1, 2))
+        return float(np.sqrt(np.mean(np.sum((projected - image_points) ** 2, axis=1))))
+
+    # Returns (A, 3) rvecs and tvecs for each anchor, as estimatePoseSingleMarkers would give them.
+    # Anchors lie flat on the board with the board's axes, so they share its rotation and are offset by their centers.
+    def anchor_poses(self, anchor_infos):
+        centers = np.array([[info.board_position[0] * self.cm_to_space, info.board_position[1] * self.cm_to_space, 0] for info in anchor_infos], dtype=np.float64).reshape((-1, 3))
+        rvecs = np.tile(self.rvec, (len(centers), 1))
+        tvecs = self.tvec + centers @ self.rotation.T
+        return rvecs, tvecs
+
+    def __str__(self):
+        if self.cached:
+            return f"Cached BoardPose (last checked against anchors {self.anchor_ids}), reprojection error {self.reprojection_error:.2f} px"
+        return f"BoardPose from anchors {self.anchor_ids}, reprojection error {self.reprojection_error:.2f} px"
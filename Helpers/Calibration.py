@@ -0,0 +1,145 @@
+# A Calibration holds a camera's parsed intrinsics (camera matrix and distortion coefficients) for one frame size.
+# A CalibrationRegistry keeps every Calibration a program has loaded, keyed by camera and resolution:
+# each .yaml file (or yaml string) is only read and parsed once, and asking for a resolution that was never calibrated
+# rescales the camera's calibration for it. Cameras without any calibration get a guess, like get_calib_matrices.
+# To use it:
+#   calibrations.register("table-3", "CameraCalibration/table3.yaml")
+#   calibration = calibrations.get("table-3", 1280, 720)
+#   game = DummyGame(calibration)
+# GamesFrame takes a Calibration in place of the yaml, and rescales it by itself if the frames it gets change size.
+
+import os
+import threading
+import yaml
+import numpy as np
+
+class Calibration:
+    def __init__(self, cam_matrix, dist_coeff, size: tuple[int, int] = None):
+        # Shared between every GamesFrame using this calibration, so they are read-only.
+        self.cam_matrix = np.array(cam_matrix, dtype=np.float64).reshape((3, 3))
+        self.dist_coeff = np.array(dist_coeff, dtype=np.float64).reshape((1, -1))
+        self.cam_matrix.setflags(write=False)
+        self.dist_coeff.setflags(write=False)
+
+        # (width, height) of the frames this calibration is for. None if unknown, in which case it can't be rescaled to a resolution.
+        self.size = None if size is None else (int(size[0]), int(size[1]))
+
+    # Builds a Calibration from a .yaml file path or yaml data with camera_matrix, dist_coeff and optionally image_size ([width, height]).
+    # size is used when the yaml doesn't say which frame size it was calibrated at.
+    @staticmethod
+    def from_yaml(source: str, size: tuple[int, int] = None):
+        if source.endswith(".yaml") or source.endswith(".yml"):
+            with open(source) as file:
+                data = yaml.safe_load(file)
+        else:
+            data = yaml.safe_load(source)
+        return Calibration(data["camera_matrix"], data["dist_coeff"], data.get("image_size", size))
+
+    # Guesses a calibration for a width x height camera: no distortion, principal point at the centre.
+    @staticmethod
+    def guess(width: int, height: int):
+        focal = (width + height) / 2
+        return Calibration([[focal, 0.0, width / 2], [0.0, focal, height / 2], [0.0, 0.0, 1.0]], [[0, 0, 0, 0, 0]], (width, height))
+
+    # Returns this calibration for frames resized by scale_x (and scale_y, the same if not given).
+    # Only the camera matrix changes; distortion coefficients don't depend on resolution.
+    def scaled(self, scale_x: float, scale_y: float = None):
+        scale_y = scale_x if scale_y is None else scale_y
+        cam_matrix = self.cam_matrix.copy()
+        cam_matrix[0, [0, 2]] *= scale_x    # f_x, c_x
+        cam_matrix[1, [1, 2]] *= scale_y    # f_y, c_y
+        size = None if self.size is None else (round(self.size[0] * scale_x), round(self.size[1] * scale_y))
+        return Calibration(cam_matrix, self.dist_coeff, size)
+
+    # Returns this calibration rescaled for width x height frames, which must have the same aspect ratio (see same_aspect).
+    def scaled_to(self, width: int, height: int):
+        if self.size is None:
+            raise Exception("Calibration: can't rescale a calibration whose image size is unknown.")
+        if (width, height) == self.size:
+            return self
+        if not self.same_aspect(width, height):
+            raise Exception(f"Calibration: can't rescale a {self.size[0]}x{self.size[1]} calibration to {width}x{height}, which has a different aspect ratio.")
+        calibration = self.scaled(width / self.size[0], height / self.size[1])
+        calibration.size = (width, height)
+        return calibration
+
+    # Returns True if width x height frames have (within 1%) the same shape as this calibration's.
+    # Other aspect ratios usually mean the sensor is cropped, which rescaling can't account for.
+    def same_aspect(self, width: int, height: int):
+        return self.size is not None and abs(width * self.size[1] / (height * self.size[0]) - 1) < 0.01
+
+    # Returns the calibration as a yaml string, in the same format as the .yaml files.
+    def to_yaml(self):
+        data = {"camera_matrix": self.cam_matrix.tolist(), "dist_coeff": self.dist_coeff.tolist()}
+        if self.size is not None:
+            data["image_size"] = list(self.size)
+        return yaml.dump(data)
+
+    def __str__(self):
+        return f"Calibration({'unknown size' if self.size is None else f'{self.size[0]}x{self.size[1]}'}, f=({self.cam_matrix[0, 0]:.1f}, {self.cam_matrix[1, 1]:.1f}))"
+
+class CalibrationRegistry:
+    def __init__(self):
+        # Parsed yaml, keyed by the yaml string, or by a file's path and modification time (so an edited file is read again).
+        self.parsed = {}
+
+        # camera -> {(width, height): Calibration}. The first one registered for a camera is what other resolutions are rescaled from.
+        self.profiles = {}
+
+        # Streamlit pages and camera threads can share the registry.
+        self.lock = threading.Lock()
+
+    # Returns the Calibration for a .yaml path or yaml string, parsing it only the first time.
+    def parse(self, source: str, size: tuple[int, int] = None):
+        key = (os.path.abspath(source), os.path.getmtime(source)) if os.path.isfile(source) else source
+        with self.lock:
+            if key not in self.parsed:
+                self.parsed[key] = Calibration.from_yaml(source, size)
+            return self.parsed[key]
+
+    # Records a camera's calibration, given as a Calibration, a .yaml path or a yaml string. Returns the Calibration.
+    # size is the frame size it was calibrated at, if the yaml doesn't say.
+    def register(self, camera: str, source, size: tuple[int, int] = None):
+        calibration = source if isinstance(source, Calibration) else self.parse(source, size)
+        if calibration.size is None:
+            raise Exception(f"CalibrationRegistry: the calibration for '{camera}' needs an image size.")
+        with self.lock:
+            self.profiles.setdefault(camera, {})[calibration.size] = calibration
+        return calibration
+
+    # Returns the calibration for a camera's width x height frames.
+    # A resolution that wasn't registered is rescaled from the camera's closest calibration of the same shape, or guessed if the camera has none.
+    # Either way the result is kept, so later calls for it are just a lookup.
+    def get(self, camera: str, width: int, height: int):
+        size = (int(width), int(height))
+        with self.lock:
+            profiles = self.profiles.setdefault(camera, {})
+            if size in profiles:
+                return profiles[size]
+
+            if len(profiles) == 0:
+                calibration = Calibration.guess(*size)
+            else:
+                candidates = [c for c in profiles.values() if c.same_aspect(*size)]
+                if len(candidates) == 0:
+                    raise Exception(f"CalibrationRegistry: '{camera}' has no calibration with the same aspect ratio as {size[0]}x{size[1]}.")
+                calibration = min(candidates, key=lambda c: abs(c.size[0] - size[0])).scaled_to(*size)
+
+            profiles[size] = calibration
+            return calibration
+
+    # Returns the calibration for the frames a cv2.VideoCapture delivers.
+    # Uses the capture's reported frame size, or reads a frame if it doesn't report one.
+    def for_capture(self, camera: str, capture):
+        width = int(capture.get(3))    # cv2.CAP_PROP_FRAME_WIDTH
+        height = int(capture.get(4))   # cv2.CAP_PROP_FRAME_HEIGHT
+        while width <= 0 or height <= 0:
+            ok, image = capture.read()
+            if ok:
+                height, width = image.shape[:2]
+            else:
+                print("Trying to access given camera...")
+        return self.get(camera, width, height)
+
+# The registry shared by everything in one process.
+calibrations = CalibrationRegistry()
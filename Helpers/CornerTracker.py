@@ -0,0 +1,103 @@
+# A CornerTracker follows marker corners from frame to frame with pyramidal Lucas-Kanade optical flow.
+# Between full ArUco detections, tracking four corners per marker is far cheaper than thresholding and searching the
+# whole frame, and it keeps following markers that are too blurred mid-move for the detector to decode.
+# Every tracked frame is validated; if any marker's corners look wrong the tracker gives up and a full detection runs instead.
+# GamesFrame uses one of these when it is created with optical_flow=True.
+
+import cv2
+import numpy as np
+
+class CornerTracker:
+    def __init__(self, detect_interval: int = 5, max_flow_error: float = 1.0, max_area_change: float = 0.5, win_size: int = 21, levels: int = 3):
+        if detect_interval < 1:
+            raise Exception("CornerTracker: detect_interval must be at least 1.")
+
+        # Frames tracked between full detections. New markers only show up at a detection.
+        self.detect_interval = detect_interval
+
+        # How far (pixels) a corner may end up from where it started when tracked forward then back again.
+        self.max_flow_error = max_flow_error
+
+        # How much a marker's area may grow or shrink (as a fraction) between frames before its track is distrusted.
+        self.max_area_change = max_area_change
+
+        self.lk_params = {
+            "winSize": (win_size, win_size),
+            "maxLevel": levels,
+            "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        }
+
+        self.reset()
+
+    # Forgets the tracked markers, so the next frame gets a full detection.
+    def reset(self):
+        self.previous_gray = None
+        self.corners = None
+        self.ids = None
+        self.frames_since_detection = 0
+
+    # Returns True if this frame needs a full detection instead of tracking.
+    def detection_due(self):
+        return self.corners is None or len(self.corners) == 0 or self.frames_since_detection >= self.detect_interval
+
+    # Starts tracking from a full detection. corners is a list of (1, 4, 2) arrays and ids the detector's (N, 1) ids.
+    def remember(self, gray, corners, ids):
+        self.previous_gray = gray
+        self.corners = np.asarray(corners, dtype=np.float32).reshape((-1, 4, 2)) if len(corners) > 0 else None
+        self.ids = ids
+        self.frames_since_detection = 0
+
+    # Tracks the remembered corners into gray. Returns (corners, ids) in detectMarkers' format, or None if tracking failed.
+    def track(self, gray):
+        count = len(self.corners)
+
+        # Only the area around the markers is needed: the search can reach win_size pixels at the coarsest pyramid level.
+        height, width = gray.shape[:2]
+        reach = self.lk_params["winSize"][0] * 2 ** self.lk_params["maxLevel"]
+        flat = self.corners.reshape((-1, 2))
+        x0, y0 = np.maximum(np.floor(flat.min(axis=0)).astype(int) - reach, 0)
+        x1, y1 = np.minimum(np.ceil(flat.max(axis=0)).astype(int) + reach, [width, height])
+        previous_patch = self.previous_gray[y0:y1, x0:x1]
+        patch = gray[y0:y1, x0:x1]
+        offset = np.array([x0, y0], dtype=np.float32)
+        points = (flat - offset).reshape((-1, 1, 2))
+
+        # Track forward, then back again: a point that doesn't return to where it started was tracked badly.
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(previous_patch, patch, points, None, **self.lk_params)
+        if forward is None:
+            return None
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(patch, previous_patch, forward, None, **self.lk_params)
+        if backward is None:
+            return None
+
+        ok = (status.reshape(-1) == 1) & (back_status.reshape(-1) == 1)
+        round_trip = np.linalg.norm((backward - points).reshape((-1, 2)), axis=1)
+        if not np.all(ok) or np.any(round_trip > self.max_flow_error):
+            return None
+
+        tracked = forward.reshape((count, 4, 2)) + offset
+        if not self.plausible(self.corners, tracked):
+            return None
+
+        self.previous_gray = gray
+        self.corners = tracked
+        self.frames_since_detection += 1
+        return [marker_corners.reshape((1, 4, 2)) for marker_corners in tracked], self.ids
+
+    # Checks that every tracked marker is still a convex quadrilateral in the same corner order, without a sudden change in size.
+    def plausible(self, before, after):
+        for old, new in zip(before, after):
+            if not cv2.isContourConvex(new.reshape((-1, 1, 2))):
+                return False
+            # Signed area keeps its sign only if the corners kept their winding order.
+            old_area = self.signed_area(old)
+            new_area = self.signed_area(new)
+            if old_area == 0 or new_area / old_area < 1 - self.max_area_change or new_area / old_area > 1 + self.max_area_change:
+                return False
+        return True
+
+    # Shoelace area of a (4, 2) quadrilateral; the sign gives the winding order.
+    @staticmethod
+    def signed_area(quad):
+        x, y = quad[:, 0], quad[:, 1]
+        return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
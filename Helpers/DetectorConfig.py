@@ -0,0 +1,73 @@
+# Builds the ArUco detector used by a GamesFrame.
+# Detectors are built once per GamesFrame and reused for every frame.
+# Presets trade recall for latency; pick one per deployment and override single knobs as needed.
+
+import numpy as np
+from cv2 import aruco
+
+# Each preset maps aruco.DetectorParameters attribute names to values.
+# Anything not listed keeps OpenCV's default.
+DETECTOR_PRESETS = {
+    # Two threshold passes instead of three and no corner refinement.
+    # Good for large markers on a close camera; may miss small or badly lit pieces.
+    "fast": {
+        "adaptiveThreshWinSizeMin": 5,
+        "adaptiveThreshWinSizeMax": 25,
+        "adaptiveThreshWinSizeStep": 20,
+        "cornerRefinementMethod": aruco.CORNER_REFINE_NONE,
+    },
+    # OpenCV's defaults. This is what GamesFrame has always used.
+    "balanced": {},
+    # More threshold passes, smaller minimum marker size, and sub-pixel corners.
+    # Best for small markers (e.g. Dodgem's 1.23 cm pieces) at the cost of latency.
+    "accurate": {
+        "adaptiveThreshWinSizeMin": 3,
+        "adaptiveThreshWinSizeMax": 33,
+        "adaptiveThreshWinSizeStep": 5,
+        "minMarkerPerimeterRate": 0.01,
+        "perspectiveRemovePixelPerCell": 8,
+        "cornerRefinementMethod": aruco.CORNER_REFINE_SUBPIX,
+        "cornerRefinementWinSize": 5,
+    },
+}
+
+DEFAULT_PRESET = "balanced"
+
+# Returns DetectorParameters for a preset, with any overrides applied on top.
+def build_detector_parameters(preset: str = DEFAULT_PRESET, overrides: dict = None):
+    if preset not in DETECTOR_PRESETS:
+        raise Exception(f"DetectorConfig: Unknown detector preset '{preset}'. Choose from {list(DETECTOR_PRESETS.keys())}.")
+
+    parameters = aruco.DetectorParameters()
+    settings = dict(DETECTOR_PRESETS[preset])
+    if overrides is not None:
+        settings.update(overrides)
+
+    for name, value in settings.items():
+        if not hasattr(parameters, name):
+            raise Exception(f"DetectorConfig: '{name}' is not an aruco.DetectorParameters setting.")
+        setattr(parameters, name, value)
+
+    return parameters
+
+# Returns a reusable aruco.ArucoDetector for the given dictionary.
+def build_detector(dictionary, preset: str = DEFAULT_PRESET, overrides: dict = None):
+    return aruco.ArucoDetector(dictionary, build_detector_parameters(preset, overrides))
+
+# The dictionary every GamesPlane marker is printed from.
+BASE_DICTIONARY = aruco.DICT_ARUCO_ORIGINAL
+
+# Builds a dictionary holding only the given marker ids from the base dictionary, so detection only tries to match codes a game actually uses.
+# A detector using it reports ids as positions in marker_ids; index the returned array with them to get the original ids back.
+# Returns (dictionary, original_ids).
+def build_game_dictionary(marker_ids, base: int = BASE_DICTIONARY):
+    base_dictionary = aruco.getPredefinedDictionary(base)
+    original_ids = np.unique(np.asarray(marker_ids, dtype=np.int64))
+    if len(original_ids) == 0:
+        raise Exception("DetectorConfig: A game dictionary needs at least one marker id.")
+    if original_ids[0] < 0 or original_ids[-1] >= len(base_dictionary.bytesList):
+        raise Exception(f"DetectorConfig: Marker ids must be between 0 and {len(base_dictionary.bytesList) - 1}.")
+
+    # Same marker size and error correction as the base dictionary, so every marker decodes exactly as it did before.
+    dictionary = aruco.Dictionary(base_dictionary.bytesList[original_ids], base_dictionary.markerSize, base_dictionary.maxCorrectionBits)
+    return dictionary, original_ids
@@ -12,9 +12,11 @@ import numpy as np
 from typing import List
 from .PhysicalAruco import * 
 from .PhysicalBoardInfo import *
+from .BoardMath import locate_from_anchors
+from .FrameTrace import FrameTrace
 
 class DigitalAruco:
-    def __init__(self, raw_corners, phys: PhysicalAruco, cam_matrix, dist_coeff):
+    def __init__(self, raw_corners, phys: PhysicalAruco, cam_matrix, dist_coeff, rvec=None, tvec=None):
         if raw_corners.shape != (1, 4, 2):
             raise Exception(f"DigitalAruco object with invalid raw_corners: shape is {raw_corners.shape} (should be (4, 1, 2))")
 
@@ -46,7 +48,11 @@ class DigitalAruco:
             self.exact_board_position = None
             self.closest_board_position = None
 
-        self.to_world_coordinates(cam_matrix, dist_coeff)
+        # A GamesFrame may have already estimated this pose in a batch with the other markers in the frame.
+        if rvec is None or tvec is None:
+            self.to_world_coordinates(cam_matrix, dist_coeff)
+        else:
+            self.rvec, self.tvec = rvec, tvec
 
 
     # Converts my screen coordinates to world coordinates using camera calibration data.
@@ -74,8 +80,6 @@ class DigitalAruco:
     # Converts my world coordinates to a board position given some information about the board and the locations of the markers.
     # anchor_markers is one or more anchor arucos used as reference points.
     def to_board_position(self, anchor_markers: List[DigitalAruco], board: PhysicalBoardInfo, give_reasoning: bool = False):
-        reasoning = []
-
         if self.phys.anchored:
             raise Exception("Tried to calculate the board position of an anchor, but anchors are precalculated.")
         
@@ -91,44 +95,47 @@ class DigitalAruco:
             if not marker_data.fully_defined():
                 raise Exception("A marker in anchor_markers is not fully defined (call to_world_coordinates and set_board_position on each anchor)")
 
-        # We use each anchor to extract an approximate board position, then average and round at the end.
-        pos_estimates_x = []
-        pos_estimates_y = []
-        weights = []
-
-        for marker_data in anchor_markers:
-            # Redefine the piece's pose in terms of the chosen anchor.
-            _, rebased_tvec = DigitalAruco.change_basis(marker_data.rvec, marker_data.tvec, self.rvec, self.tvec)
-            reasoning.append(f"Locating Piece {self.phys.id}: Anchor {marker_data.phys.id} says an offset of {rebased_tvec}")
-            
-            # Use the tvec to get a board position.
-            this_pos_estimate = [rebased_tvec[0] / board.cm_to_space, rebased_tvec[1] / board.cm_to_space]
-
-            # Offset by the anchor's place.
-            reasoning.append(f"Locating Piece {self.phys.id}: Anchor {marker_data.phys.id} says raw estimate of {this_pos_estimate}")
-            this_pos_estimate[0] += marker_data.closest_board_position[0]
-            this_pos_estimate[1] += marker_data.closest_board_position[1]
-
-            pos_estimates_x.append(this_pos_estimate[0])
-            pos_estimates_y.append(this_pos_estimate[1])
-
-            # Distance to weight. Closer anchors count for more.
-            weights.append(2 ** (-1 * np.linalg.norm(rebased_tvec)))
-            #print(weights[-1])
-
-            reasoning.append(f"Locating Piece {self.phys.id}: Anchor {marker_data.phys.id} estimates at {round(this_pos_estimate[0], 2), round(this_pos_estimate[1], 2)}")
-
-        # Save the exact (decimal) board pos in case we need it.
-        self.exact_board_position = [np.average(pos_estimates_x, weights=weights), np.average(pos_estimates_y, weights=weights)]
-
-        # Ask the board for the closest space.
-        self.closest_board_position = board.closest_valid_space(self.exact_board_position)
+        reasoning = DigitalAruco.to_board_positions([self], anchor_markers, board, give_reasoning)
 
         if not give_reasoning:
             return self.closest_board_position
         else:
-            return self.closest_board_position, reasoning
-    
+            return self.closest_board_position, reasoning[0]
+
+    # Calculates the board position of every piece at once from the same anchors.
+    # Anchor rotations are converted once, and all piece/anchor pairs are projected in a single tensor operation.
+    # Returns a list of reasoning lists (one per piece) if give_reasoning, otherwise None.
+    @staticmethod
+    def to_board_positions(pieces: List[DigitalAruco], anchor_markers: List[DigitalAruco], board: PhysicalBoardInfo, give_reasoning: bool = False):
+        if len(pieces) == 0:
+            return [] if give_reasoning else None
+
+        # We use each anchor to extract an approximate board position, then take a weighted average.
+        # Each piece's pose is redefined in terms of each anchor, then offset by the anchor's place.
+        rebased, estimates, weights, positions = locate_from_anchors(
+            [marker_data.rvec for marker_data in anchor_markers],
+            [marker_data.tvec for marker_data in anchor_markers],
+            [marker_data.closest_board_position for marker_data in anchor_markers],
+            [piece.tvec for piece in pieces],
+            board.cm_to_space
+        )
+
+        # Ask the board for the closest spaces.
+        closest = board.closest_valid_spaces(positions)
+
+        for i, piece in enumerate(pieces):
+            # Save the exact (decimal) board pos in case we need it.
+            piece.exact_board_position = [positions[i][0], positions[i][1]]
+            piece.closest_board_position = closest[i]
+
+        if not give_reasoning:
+            return None
+
+        trace = FrameTrace()
+        trace.record("anchor_estimates", piece_ids=[piece.phys.id for piece in pieces], anchor_ids=[marker_data.phys.id for marker_data in anchor_markers],
+                     rebased=rebased, estimates=estimates, cm_to_space=board.cm_to_space)
+        return trace.by_piece()
+
     # Changes the basis of the second rvec, tvec to be in the first.
     def change_basis(rvec1, tvec1, rvec2, tvec2):
         # Convert to rotation matrices
@@ -0,0 +1,124 @@
+# A FrameDetections is the compact result of processing one image with a GamesFrame.
+# Instead of one DigitalAruco object per marker, every marker's data lives in contiguous NumPy arrays (row i is marker i).
+# Anchors come first, then pieces. DigitalAruco objects are only built if a caller asks for them.
+
+import numpy as np
+from .DigitalAruco import DigitalAruco
+from .PhysicalBoardInfo import PhysicalBoardInfo
+
+class FrameDetections:
+    __slots__ = (
+        "ids", "corners", "pose_corners", "anchored", "rvecs", "tvecs", "exact_positions", "closest_indices",
+        "board_info", "cam_matrix", "dist_coeff", "board_pose", "rejected", "reasoning", "reused_from",
+        "_anchors", "_pieces",
+    )
+
+    def __init__(self, ids, corners, anchored, rvecs, tvecs, board_info: PhysicalBoardInfo, cam_matrix, dist_coeff):
+        count = len(ids)
+
+        # (N,) ArUco ids, (N, 4, 2) pixel corners (TL, TR, BR, BL), and (N,) True for anchors.
+        self.ids = ids
+        self.corners = corners
+        self.anchored = anchored
+
+        # (N, 4, 2) corners used for pose estimation: the same as corners unless GamesFrame undistorted them separately.
+        self.pose_corners = corners
+
+        # (N, 3) rotation (Rodrigues form) and translation of each marker relative to the camera.
+        self.rvecs = rvecs
+        self.tvecs = tvecs
+
+        # (N, 2) exact board positions, NaN for pieces that could not be located.
+        # Anchors use their preset board_position.
+        self.exact_positions = np.full((count, 2), np.nan)
+        for i in np.flatnonzero(anchored):
+            self.exact_positions[i] = board_info.aruco_by_id[ids[i]].board_position
+
+        # (N,) index into board_info.valid_board_positions of each piece's closest space; -1 for anchors and unlocated pieces.
+        self.closest_indices = np.full(count, -1, dtype=np.int64)
+
+        self.board_info = board_info
+        self.cam_matrix = cam_matrix
+        self.dist_coeff = dist_coeff
+
+        # The fused board pose for this frame, if one was solved.
+        self.board_pose = None
+
+        # True if the frame's board pose was too poor to trust any piece position.
+        self.rejected = False
+
+        # A FrameTrace of how each piece was located, if it was asked for.
+        self.reasoning = None
+
+        # (N,) row of each marker in the previous frame's FrameDetections if its results were reused from there, otherwise -1.
+        self.reused_from = np.full(count, -1, dtype=np.int64)
+
+        # DigitalAruco views, built on first request.
+        self._anchors = None
+        self._pieces = None
+
+    # An empty result, for frames where nothing was found.
+    @staticmethod
+    def empty(board_info: PhysicalBoardInfo, cam_matrix, dist_coeff):
+        return FrameDetections(
+            np.zeros(0, dtype=np.int64),
+            np.zeros((0, 4, 2), dtype=np.float32),
+            np.zeros(0, dtype=bool),
+            np.zeros((0, 3)),
+            np.zeros((0, 3)),
+            board_info, cam_matrix, dist_coeff
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Returns the PhysicalAruco for row i.
+    def phys(self, i):
+        return self.board_info.aruco_by_id[self.ids[i]]
+
+    # Returns the closest valid board position for row i (the anchor's own position for anchors), or None if unlocated.
+    def closest_position(self, i):
+        if self.anchored[i]:
+            return self.phys(i).board_position
+        if self.closest_indices[i] < 0:
+            return None
+        return self.board_info.valid_board_positions[self.closest_indices[i]]
+
+    # Returns the DigitalAruco objects for the anchors.
+    def anchors(self):
+        if self._anchors is None:
+            self._anchors = [self._view(i) for i in np.flatnonzero(self.anchored)]
+        return self._anchors
+
+    # Returns the DigitalAruco objects for the pieces. Rejected frames have no trustworthy pieces.
+    def pieces(self):
+        if self.rejected:
+            return []
+        if self._pieces is None:
+            self._pieces = [self._view(i) for i in np.flatnonzero(~self.anchored)]
+        return self._pieces
+
+    # Builds a DigitalAruco for row i from the data already calculated.
+    def _view(self, i):
+        aru = DigitalAruco(self.corners[i].reshape((1, 4, 2)), self.phys(i), self.cam_matrix, self.dist_coeff, self.rvecs[i], self.tvecs[i])
+        if not self.anchored[i] and self.closest_indices[i] >= 0:
+            aru.exact_board_position = [self.exact_positions[i][0], self.exact_positions[i][1]]
+            aru.closest_board_position = self.closest_position(i)
+        return aru
+
+    # Returns plain lists and numbers describing this frame, e.g. for writing results to JSON.
+    def to_dict(self):
+        return {
+            "ids": self.ids.tolist(),
+            "anchored": self.anchored.tolist(),
+            "corners": self.corners.tolist(),
+            "rvecs": self.rvecs.tolist(),
+            "tvecs": self.tvecs.tolist(),
+            "exact_positions": [None if np.isnan(row[0]) else row.tolist() for row in self.exact_positions],
+            "closest_positions": [self.closest_position(i) for i in range(len(self))],
+            "reprojection_error": None if self.board_pose is None else self.board_pose.reprojection_error,
+            "rejected": self.rejected,
+        }
+
+    def __str__(self):
+        return f"FrameDetections with {int(np.sum(self.anchored))} anchors and {int(np.sum(~self.anchored))} pieces{' (rejected)' if self.rejected else ''}"
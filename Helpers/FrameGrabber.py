@@ -0,0 +1,98 @@
+# A FrameGrabber reads frames from a camera on its own thread.
+# It only keeps the newest frame: if processing falls behind, older frames are dropped instead of queueing up.
+# This keeps camera buffering and slow frames from adding latency to the processing loop.
+# To use it:
+# 1. grabber = FrameGrabber(open_source(...)) (or any cv2.VideoCapture) and grabber.start()
+# 2. In your loop, ok, frame = grabber.read() always gives the freshest frame you haven't seen yet.
+# 3. grabber.stop() when finished.
+
+import threading
+import time
+
+class FrameGrabber:
+    # How long read() waits for a new frame by default, in seconds.
+    READ_TIMEOUT = 1.0
+
+    # How long to back off after the camera fails to give a frame, in seconds.
+    RETRY_DELAY = 0.01
+
+    def __init__(self, camera):
+        # Anything with a cv2.VideoCapture-style read() -> (ok, frame).
+        self.camera = camera
+
+        # The single-slot "latest frame wins" buffer, guarded by a condition so readers can wait for new frames.
+        self._condition = threading.Condition()
+        self._frame = None
+        self._timestamp = None
+        self._captured = 0
+        self._last_read = 0
+
+        # How many frames were overwritten before anyone read them.
+        self.dropped = 0
+
+        self._running = False
+        self._thread = None
+
+    # Starts the capture thread. Does nothing if it is already running.
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="FrameGrabber", daemon=True)
+        self._thread.start()
+        return self
+
+    # Stops the capture thread. The camera itself is left open.
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def is_running(self):
+        return self._running
+
+    def _capture_loop(self):
+        while self._running:
+            ok, frame = self.camera.read()
+            timestamp = time.time()
+            if not ok or frame is None:
+                time.sleep(self.RETRY_DELAY)
+                continue
+
+            with self._condition:
+                if self._captured > self._last_read:
+                    self.dropped += 1
+                self._frame = frame
+                self._timestamp = timestamp
+                self._captured += 1
+                self._condition.notify_all()
+
+    # Returns (ok, frame, timestamp) for the newest frame not yet returned, waiting up to timeout seconds for one.
+    # timestamp is the time.time() at which the frame was captured.
+    # Returns (False, None, None) if no new frame arrived in time.
+    def read_timestamped(self, timeout: float = READ_TIMEOUT):
+        with self._condition:
+            has_new = self._condition.wait_for(lambda: self._captured > self._last_read or not self._running, timeout)
+            if not has_new or self._captured == self._last_read:
+                return False, None, None
+            self._last_read = self._captured
+            return True, self._frame, self._timestamp
+
+    # Drop-in replacement for cv2.VideoCapture.read(): returns (ok, frame) for the newest unseen frame.
+    def read(self, timeout: float = READ_TIMEOUT):
+        ok, frame, _ = self.read_timestamped(timeout)
+        return ok, frame
+
+    # How old the newest captured frame is, in seconds. None before the first frame.
+    def latency(self):
+        with self._condition:
+            return None if self._timestamp is None else time.time() - self._timestamp
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,336 @@
+# Frame sources give every script and page the same way to get frames, whatever they come from:
+# - CameraSource: a live camera, with the capture backend, FOURCC, resolution, frame rate and driver buffer size chosen explicitly.
+#   On Linux it uses V4L2 with a one-frame buffer, so frames aren't already several frames old when they are read.
+# - VideoFileSource: a recorded video.
+# - ImageDirectorySource: every image in a folder (e.g. TestGraphics/TicTacToe), in name order.
+# - SyntheticSource: renders a game's board and pieces, for trying things out without a camera.
+# They all behave like a cv2.VideoCapture (read, get, isOpened, release), so they work with FrameGrabber and calibrations.for_capture.
+# To use it:
+#   source = open_source("LIVE", width=1280, height=720, fourcc="MJPG")
+#   ok, frame = source.read()
+
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from cv2 import aruco
+from .DetectorConfig import BASE_DICTIONARY
+
+class FrameSource(ABC):
+    def __init__(self):
+        # (width, height) of the frames, once known.
+        self.size = None
+        self.fps = 0.0
+
+        # Seconds into the source of the last frame read: media time for files, capture time for cameras.
+        self.timestamp = None
+
+    # Returns (ok, frame, timestamp) for the next frame.
+    @abstractmethod
+    def read_timestamped(self):
+        pass
+
+    # Returns (ok, frame), like cv2.VideoCapture.read().
+    def read(self):
+        ok, frame, _ = self.read_timestamped()
+        return ok, frame
+
+    # Answers the cv2.CAP_PROP_* questions callers ask a capture.
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return 0 if self.size is None else self.size[0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return 0 if self.size is None else self.size[1]
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return 0 if self.timestamp is None else self.timestamp * 1000
+        return 0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class CameraSource(FrameSource):
+    # Capture backend used for cameras on each platform. DirectShow only exists on Windows.
+    DEFAULT_BACKENDS = {"linux": cv2.CAP_V4L2, "win32": cv2.CAP_DSHOW}
+
+    def __init__(self, device=0, width: int = None, height: int = None, fourcc: str = None, fps: float = None, buffer_size: int = 1, backend: int = None):
+        super().__init__()
+
+        # device is a camera index or a device path such as /dev/video2.
+        self.device = device
+        self.backend = self.DEFAULT_BACKENDS.get(sys.platform, cv2.CAP_ANY) if backend is None else backend
+        self.capture = cv2.VideoCapture(device, self.backend)
+        if not self.capture.isOpened():
+            raise Exception(f"CameraSource: Could not open camera {device}.")
+
+        # V4L2 only accepts some resolutions in some formats (e.g. 1080p at 30fps usually needs MJPG), so the format is set first.
+        if fourcc is not None:
+            self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        if width is not None:
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height is not None:
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps is not None:
+            self.capture.set(cv2.CAP_PROP_FPS, fps)
+
+        # Frames the driver queues up. Every queued frame is a frame of latency once processing can't keep up.
+        if buffer_size is not None:
+            self.capture.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+        # Drivers may silently pick something else, so keep what was actually granted.
+        self.size = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.fourcc = int(self.capture.get(cv2.CAP_PROP_FOURCC)).to_bytes(4, "little").decode("ascii", "replace")
+        self.buffer_size = self.capture.get(cv2.CAP_PROP_BUFFERSIZE)
+        if (width is not None and self.size[0] != width) or (height is not None and self.size[1] != height):
+            print(f"CameraSource: camera {device} gives {self.size[0]}x{self.size[1]} instead of {width}x{height}.")
+
+    def read_timestamped(self):
+        ok, frame = self.capture.read()
+        self.timestamp = time.time()
+        if ok and frame is not None:
+            self.size = (frame.shape[1], frame.shape[0])
+        return ok, frame, self.timestamp
+
+    def get(self, prop):
+        return self.capture.get(prop)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+    def __str__(self):
+        return f"CameraSource({self.device}, {self.size[0]}x{self.size[1]} {self.fourcc} @ {self.fps:.0f}fps, buffer {self.buffer_size:.0f})"
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: str, loop: bool = False):
+        super().__init__()
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise Exception(f"VideoFileSource: Could not open video {path}.")
+
+        # With loop on, the video starts over when it ends instead of running out of frames.
+        self.loop = loop
+        self.size = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+
+    def read_timestamped(self):
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        self.timestamp = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        return ok, frame, self.timestamp
+
+    def get(self, prop):
+        return self.capture.get(prop)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+    def __str__(self):
+        return f"VideoFileSource({self.path})"
+
+class ImageDirectorySource(FrameSource):
+    IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+    def __init__(self, path: str, loop: bool = False, recursive: bool = False, fps: float = 1.0):
+        super().__init__()
+        self.path = path
+        if recursive:
+            files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+        else:
+            files = [os.path.join(path, name) for name in os.listdir(path)]
+        self.files = sorted(f for f in files if f.lower().endswith(self.IMAGE_EXTENSIONS))
+        if len(self.files) == 0:
+            raise Exception(f"ImageDirectorySource: No images in {path}.")
+
+        self.loop = loop
+
+        # Images have no time of their own; each one counts as 1/fps seconds.
+        self.fps = fps
+        self.index = 0
+
+        # Images can differ in size; this is the first one's until others are read.
+        first = cv2.imread(self.files[0])
+        self.size = None if first is None else (first.shape[1], first.shape[0])
+
+    def read_timestamped(self):
+        if self.index >= len(self.files):
+            if not self.loop:
+                return False, None, None
+            self.index = 0
+
+        frame = cv2.imread(self.files[self.index])
+        self.timestamp = self.index / self.fps
+        self.index += 1
+        if frame is None:
+            print(f"ImageDirectorySource: Could not read {self.files[self.index - 1]}.")
+            return False, None, self.timestamp
+        self.size = (frame.shape[1], frame.shape[0])
+        return True, frame, self.timestamp
+
+    # The file the last frame came from.
+    def current_file(self):
+        return None if self.index == 0 else self.files[self.index - 1]
+
+    def __str__(self):
+        return f"ImageDirectorySource({self.path}, {len(self.files)} images)"
+
+class SyntheticSource(FrameSource):
+    def __init__(self, board_info, size: tuple[int, int] = (1280, 720), frames: int = None, fps: float = 30.0,
+                 tilt: float = 20.0, sway: float = 2.0, noise: float = 2.0, move_every: int = 0, pixels_per_cm: float = 20.0, seed: int = 0):
+        super().__init__()
+        self.board_info = board_info
+        self.size = (int(size[0]), int(size[1]))
+        self.fps = fps
+
+        # How many frames to give before running out (None for no end).
+        self.frames = frames
+        self.index = 0
+
+        # The camera looks down at the board tilt degrees from straight above, and drifts by up to sway degrees over time.
+        self.tilt = tilt
+        self.sway = sway
+
+        # Standard deviation of the Gaussian sensor noise added to each frame.
+        self.noise = noise
+        self.noise_buffer = None
+        self.random = np.random.default_rng(seed)
+        cv2.setRNGSeed(seed)
+
+        # Every move_every frames one piece moves to a free position (0 keeps pieces still).
+        self.move_every = move_every
+
+        # Pieces start on the first valid positions, one piece per position.
+        positions = board_info.valid_board_positions
+        self.placements = {i: tuple(positions[i % len(positions)]) for i in range(min(len(board_info.unanchored_arucos), len(positions)))}
+
+        # The board is drawn once, top down, and only re-drawn when a piece moves; each frame is then one perspective warp of it.
+        self.pixels_per_cm = pixels_per_cm
+        self.board_image = None
+        self.board_corners = None
+
+        # Camera intrinsics the frames are rendered with, matching calibrations' guess for this size (so with no distortion).
+        focal = (self.size[0] + self.size[1]) / 2
+        self.cam_matrix = np.array([[focal, 0, self.size[0] / 2], [0, focal, self.size[1] / 2], [0, 0, 1]], dtype=np.float64)
+
+    # Where every marker is on the board, in cm: (PhysicalAruco, x, y) for each anchor and placed piece.
+    def marker_positions(self):
+        cm = self.board_info.cm_to_space
+        markers = [(aru, aru.board_position[0] * cm, aru.board_position[1] * cm) for aru in self.board_info.anchored_arucos]
+        markers += [(self.board_info.unanchored_arucos[i], x * cm, y * cm) for i, (x, y) in self.placements.items()]
+        return markers
+
+    # Draws the board from straight above: white, with every marker at its position and the board's +y pointing up.
+    def draw_board(self):
+        markers = self.marker_positions()
+        ppcm = self.pixels_per_cm
+        margin = max(aru.size for aru, _, _ in markers)
+        x0 = min(x for _, x, _ in markers) - margin
+        x1 = max(x for _, x, _ in markers) + margin
+        y0 = min(y for _, _, y in markers) - margin
+        y1 = max(y for _, _, y in markers) + margin
+
+        board = np.full((int(np.ceil((y1 - y0) * ppcm)), int(np.ceil((x1 - x0) * ppcm)), 3), 255, dtype=np.uint8)
+        dictionary = aruco.getPredefinedDictionary(BASE_DICTIONARY)
+        for aru, x, y in markers:
+            side = int(round(aru.size * ppcm))
+            left = int(round((x - x0) * ppcm - side / 2))
+            top = int(round((y1 - y) * ppcm - side / 2))
+            board[top:top + side, left:left + side] = cv2.cvtColor(aruco.generateImageMarker(dictionary, aru.id, side), cv2.COLOR_GRAY2BGR)
+
+        self.board_image = board
+        self.board_corners = np.array([[x0, y1, 0], [x1, y1, 0], [x1, y0, 0], [x0, y0, 0]], dtype=np.float64)
+
+    # Moves one piece to a free valid position.
+    def move_piece(self):
+        if len(self.placements) == 0:
+            return
+        taken = set(self.placements.values())
+        free = [tuple(p) for p in self.board_info.valid_board_positions if tuple(p) not in taken]
+        if len(free) == 0:
+            return
+        piece = list(self.placements.keys())[self.random.integers(len(self.placements))]
+        self.placements[piece] = free[self.random.integers(len(free))]
+        self.board_image = None
+
+    # The camera pose for frame index: far enough back to fit the board, tilted, and drifting slowly.
+    def camera_pose(self, index):
+        corners = self.board_corners
+        extent = max(corners[:, 0].max() - corners[:, 0].min(), corners[:, 1].max() - corners[:, 1].min())
+        distance = 1.2 * extent * self.cam_matrix[0, 0] / min(self.size)
+        angle = np.radians(self.tilt + self.sway * np.sin(index / max(self.fps, 1)))
+
+        # Turning the board half a turn about x (plus the tilt) makes its +y point up in the image; the board's centre is then moved onto the optical axis.
+        rvec = np.array([np.pi + angle, 0, 0], dtype=np.float64)
+        x, y = corners[:, :2].mean(axis=0)
+        tvec = np.array([-x, y * np.cos(angle), distance + y * np.sin(angle)], dtype=np.float64)
+        return rvec, tvec
+
+    def read_timestamped(self):
+        if self.frames is not None and self.index >= self.frames:
+            return False, None, None
+
+        if self.move_every > 0 and self.index > 0 and self.index % self.move_every == 0:
+            self.move_piece()
+        if self.board_image is None:
+            self.draw_board()
+
+        rvec, tvec = self.camera_pose(self.index)
+        projected, _ = cv2.projectPoints(self.board_corners, rvec, tvec, self.cam_matrix, None)
+        height, width = self.board_image.shape[:2]
+        texture = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        homography = cv2.getPerspectiveTransform(texture, projected.reshape((4, 2)).astype(np.float32))
+        frame = cv2.warpPerspective(self.board_image, homography, self.size, flags=cv2.INTER_AREA, borderValue=(90, 90, 90))
+        if self.noise > 0:
+            # cv2.randn is several times faster than NumPy's generator at frame sizes.
+            if self.noise_buffer is None or self.noise_buffer.shape != frame.shape:
+                self.noise_buffer = np.empty(frame.shape, dtype=np.int16)
+            cv2.randn(self.noise_buffer, 0, self.noise)
+            frame = cv2.add(frame, self.noise_buffer, dtype=cv2.CV_8U)
+
+        self.timestamp = self.index / self.fps
+        self.index += 1
+        return True, frame, self.timestamp
+
+    def __str__(self):
+        return f"SyntheticSource({self.size[0]}x{self.size[1]}, {len(self.placements)} pieces)"
+
+# Opens a frame source from a description, as scripts get it on the command line:
+# "LIVE" (the first camera), a camera index ("1"), a device path ("/dev/video2"), a folder of images,
+# "synthetic" (needs board_info), or a video file.
+# options go to the source's constructor, e.g. width/height/fourcc/buffer_size for cameras, or loop for files.
+def open_source(description="LIVE", **options):
+    description = str(description)
+    if is_camera(description):
+        device = 0 if description == "LIVE" else int(description) if description.isdigit() else description
+        return CameraSource(device, **options)
+    if description == "synthetic":
+        return SyntheticSource(**options)
+    if os.path.isdir(description):
+        return ImageDirectorySource(description, **options)
+    return VideoFileSource(description, **options)
+
+# Returns True if open_source would open description as a live camera.
+def is_camera(description):
+    description = str(description)
+    return description == "LIVE" or description.isdigit() or description.startswith("/dev/video")
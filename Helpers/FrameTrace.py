@@ -0,0 +1,63 @@
+# A FrameTrace records how a GamesFrame reached its conclusions for one image.
+# Records are raw data (ids and the arrays already computed for the frame), captured only when tracing is on.
+# Nothing is formatted into strings until the trace is rendered, so an unread trace costs almost nothing,
+# and with tracing off GamesFrame never builds one at all.
+
+class FrameTrace:
+    def __init__(self):
+        # (kind, data) tuples in the order they happened.
+        self.records = []
+
+    # Adds a record. data holds references to values the frame already computed; nothing is copied or formatted.
+    def record(self, kind: str, **data):
+        self.records.append((kind, data))
+
+    # Returns the reasoning as one list of strings per piece, in the order the pieces were located.
+    def by_piece(self):
+        result = []
+        for kind, data in self.records:
+            result.extend(FORMATTERS[kind](**data))
+        return result
+
+    # Returns every reasoning line in order.
+    def lines(self):
+        return [line for piece_lines in self.by_piece() for line in piece_lines]
+
+    # Returns the whole trace as one string.
+    def render(self):
+        return "\n".join(self.lines())
+
+    # Iterating a trace gives the per-piece lists, the same shape process_image's reasoning has always had.
+    def __iter__(self):
+        return iter(self.by_piece())
+
+    def __getitem__(self, index):
+        return self.by_piece()[index]
+
+    def __str__(self):
+        return self.render()
+
+# Each formatter turns one record's data into lists of lines, one list per piece.
+
+def _format_anchor_estimates(piece_ids, anchor_ids, rebased, estimates, cm_to_space):
+    reasoning = []
+    for i, piece_id in enumerate(piece_ids):
+        piece_reasoning = []
+        for a, anchor_id in enumerate(anchor_ids):
+            piece_reasoning.append(f"Locating Piece {piece_id}: Anchor {anchor_id} says an offset of {rebased[i][a]}")
+            piece_reasoning.append(f"Locating Piece {piece_id}: Anchor {anchor_id} says raw estimate of {list(rebased[i][a][:2] / cm_to_space)}")
+            piece_reasoning.append(f"Locating Piece {piece_id}: Anchor {anchor_id} estimates at {round(estimates[i][a][0], 2), round(estimates[i][a][1], 2)}")
+        reasoning.append(piece_reasoning)
+    return reasoning
+
+def _format_pose_positions(piece_ids, board_pose, positions):
+    return [[f"Locating Piece {piece_id}: {board_pose} places it at {round(positions[i][0], 2), round(positions[i][1], 2)}"] for i, piece_id in enumerate(piece_ids)]
+
+def _format_rejected(board_pose):
+    return [[f"Rejected frame: {board_pose}"]]
+
+FORMATTERS = {
+    "anchor_estimates": _format_anchor_estimates,
+    "pose_positions": _format_pose_positions,
+    "rejected": _format_rejected,
+}
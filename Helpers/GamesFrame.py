@@ -4,61 +4,485 @@
 # 1. Instantiate the object with config information.
 # 2. Feed it in an image using .process_image(image)
 # 3. Check the returned DigitalAruco objects for information!
-import yaml
+#    (or pass compact=True to get a single FrameDetections of NumPy arrays instead)
+import time
+import cv2
 import numpy as np
 from cv2 import aruco
 from .PhysicalBoardInfo import *
 from .DigitalAruco import *
-    
+from .DetectorConfig import build_detector, build_game_dictionary, BASE_DICTIONARY, DEFAULT_PRESET
+from .BoardPose import BoardPose
+from .BoardMath import locate_from_anchors
+from .FrameDetections import FrameDetections
+from .FrameTrace import FrameTrace
+from .RegionTracker import RegionTracker
+from .PoseCache import PoseCache
+from .MotionGate import MotionGate
+from .CornerTracker import CornerTracker
+from .MarkerMemory import MarkerMemory
+from .Calibration import Calibration, calibrations
+
 class GamesFrame:
-    def __init__(self, camera_yaml: str, board_info: PhysicalBoardInfo):
-
-        # Load the calibration file.
-        if ".yaml" in camera_yaml:
-            camera_yaml = open(camera_yaml)
-        try:
-            yaml_data = yaml.safe_load(camera_yaml)
-            self.cam_matrix = np.array(yaml_data['camera_matrix'])
-            self.dist_coeff = np.array(yaml_data['dist_coeff'])
-        except:
-            print(f"GamesFrame failed to read from {camera_yaml}")
-            exit()
-        
+    # How piece positions are worked out from the anchors.
+    # "fused": solve one board pose from every anchor's corners, then map each piece through it.
+    # "anchors": re-base each piece on each anchor separately and average the estimates.
+    BOARD_SOLVERS = ("fused", "anchors")
+
+    # How lens distortion is handled.
+    # "none": the distortion model is applied inside every marker's pose estimate.
+    # "points": detected corners are undistorted in one batched call, and poses are estimated with zero distortion.
+    # "maps": each frame is remapped through precomputed undistortion maps before detection, so everything after it sees a distortion-free image.
+    UNDISTORT_MODES = ("none", "points", "maps")
+
+    def __init__(self, camera_yaml: str | Calibration, board_info: PhysicalBoardInfo, detector_preset: str = DEFAULT_PRESET, detector_overrides: dict = None,
+                 board_solver: str = "fused", max_reprojection_error: float = None,
+                 tracking: bool = False, tracking_margin: float = 1.0, full_scan_interval: int = 30,
+                 pose_cache: bool = False, pose_refresh_interval: int = 10, pose_refresh_error: float = 2.0, pose_smoothing: float = 0.5, pose_max_age: int = 90,
+                 detection_scale: float = 1.0, game_dictionary: bool = True,
+                 motion_gate: bool = False, motion_threshold: float = 0.002, max_stale_frames: int = 30,
+                 optical_flow: bool = False, flow_detect_interval: int = 5,
+                 reuse_threshold: float = None, undistort: str = "none"):
+
+        # Load the calibration: either already parsed, or a .yaml path / yaml string, which the shared registry only parses once.
+        if isinstance(camera_yaml, Calibration):
+            self.calibration = camera_yaml
+        else:
+            try:
+                self.calibration = calibrations.parse(camera_yaml)
+            except:
+                print(f"GamesFrame failed to read from {camera_yaml}")
+                exit()
+        self.cam_matrix = self.calibration.cam_matrix
+        self.dist_coeff = self.calibration.dist_coeff
+
+        # Frame size the calibration couldn't be rescaled for (a different aspect ratio), so it isn't tried (and warned about) every frame.
+        self.unscaled_size = None
+
         # Record the board info.
         self.board_info = board_info
 
+        if undistort not in self.UNDISTORT_MODES:
+            raise Exception(f"GamesFrame: Unknown undistort mode '{undistort}'. Choose from {self.UNDISTORT_MODES}.")
+        self.undistort = undistort
+
+        # Distortion of the pixel coordinates detected corners are reported in, and of the corners used for pose estimation.
+        # Both are the calibration's own except where undistortion has already removed it.
+        no_distortion = np.zeros_like(self.dist_coeff, dtype=np.float64)
+        self.image_dist_coeff = no_distortion if undistort == "maps" else self.dist_coeff
+        self.pose_dist_coeff = self.dist_coeff if undistort == "none" else no_distortion
+
+        # Undistortion maps for "maps", built for the first frame size seen (and rebuilt if it changes).
+        self.undistort_maps = None
+        self.undistort_size = None
+
+        # Build the detector once; it is reused for every frame.
+        # With game_dictionary on, it only knows the ids this board uses: other markers on the table are never identified,
+        # and each candidate is matched against a handful of codes instead of all 1024.
+        # dictionary_ids maps the detector's ids back to the original ones (None when the full dictionary is used).
+        self.detector_preset = detector_preset
+        if game_dictionary:
+            self.dictionary, self.dictionary_ids = build_game_dictionary([aru.id for aru in board_info.unanchored_arucos + board_info.anchored_arucos])
+        else:
+            self.dictionary, self.dictionary_ids = aruco.getPredefinedDictionary(BASE_DICTIONARY), None
+        self.detector = build_detector(self.dictionary, detector_preset, detector_overrides)
+
+        if board_solver not in self.BOARD_SOLVERS:
+            raise Exception(f"GamesFrame: Unknown board_solver '{board_solver}'. Choose from {self.BOARD_SOLVERS}.")
+        self.board_solver = board_solver
+
+        # Frames whose board pose reprojects the anchors worse than this (in pixels) are rejected. None accepts everything.
+        self.max_reprojection_error = max_reprojection_error
+
+        # Seconds spent in each stage of the last process_image call.
+        self.last_timings = {}
+
+        # The fused board pose of the last frame (None if it had no anchors), and whether that frame was rejected for a bad pose.
+        self.board_pose = None
+        self.frame_rejected = False
+
+        # With tracking on, detection after the first frame only searches around where the board was last seen.
+        # tracking_margin is how many board units around the board are still searched; full_scan_interval is how often the whole frame is scanned anyway.
+        # The motion gate also needs the board's region, so the tracker is kept for it even when detection isn't restricted.
+        self.tracking = tracking
+        self.region_tracker = RegionTracker(board_info, tracking_margin, full_scan_interval) if tracking or motion_gate else None
+
+        # Whether the last frame was scanned in full (always True without tracking).
+        self.last_full_scan = True
+
+        # With pose_cache on, the board pose is carried across frames: it is only solved again from the anchors every pose_refresh_interval frames
+        # or when it misses the visible anchors by more than pose_refresh_error pixels, and it keeps locating pieces for up to pose_max_age frames with every anchor hidden.
+        # Fresh poses are blended into the cached one with weight pose_smoothing.
+        if pose_cache and board_solver != "fused":
+            raise Exception("GamesFrame: pose_cache needs the 'fused' board_solver.")
+        self.pose_cache = PoseCache(self.cam_matrix, self.pose_dist_coeff, board_info.cm_to_space, pose_refresh_interval, pose_refresh_error, pose_smoothing, pose_max_age) if pose_cache else None
+
+        # With detection_scale below 1, markers are found on a frame shrunk by that factor, then their corners are refined
+        # at full resolution around each marker only. Corners always come back in full-resolution pixels, so the camera matrix is unchanged.
+        if not 0 < detection_scale <= 1:
+            raise Exception("GamesFrame: detection_scale must be in (0, 1].")
+        self.detection_scale = detection_scale
+
+        # Half-size of the full-resolution window each corner is refined in: big enough to cover the error from detecting at a smaller scale.
+        self.refine_window = int(np.ceil(1.5 / detection_scale))
+        self.refine_criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_COUNT, 30, 0.01)
+
+        # With motion_gate on, a frame whose board region looks the same as the last processed frame reuses that frame's result.
+        # motion_threshold is the fraction of the (downsampled) region that has to change; max_stale_frames caps how long a result is reused.
+        self.motion_gate = MotionGate(changed_fraction=motion_threshold, max_stale_frames=max_stale_frames) if motion_gate else None
+
+        # With optical_flow on, marker corners are followed with Lucas-Kanade optical flow for up to flow_detect_interval frames
+        # between full detections. A track that fails validation falls back to detection on the same frame.
+        self.corner_tracker = CornerTracker(flow_detect_interval) if optical_flow else None
+
+        # Whether the last frame's corners came from optical flow rather than the detector.
+        self.last_tracked = False
+
+        # With reuse_threshold set, markers whose corners are all within that many pixels of where their pose was last estimated
+        # reuse last frame's pose, and (if the board pose is unchanged) their board position, instead of recomputing them.
+        self.marker_memory = MarkerMemory(reuse_threshold) if reuse_threshold is not None else None
+
+        # The last processed result, and whether the last frame reused it instead of being processed.
+        self.last_detections = None
+        self.frame_skipped = False
+
     # Given an image, returns DigitalAruco objects for every Aruco it could find.
-    def process_image(self, image, give_reasoning: bool = False):
-        # 1. Pull out the arucos.
-        dictionary = aruco.getPredefinedDictionary(aruco.DICT_ARUCO_ORIGINAL)
-        parameters = aruco.DetectorParameters()
-        (corners, ids, rejected) = aruco.detectMarkers(image, dictionary, parameters=parameters)
+    # With compact=True, returns a FrameDetections holding the same data in arrays instead, without building any DigitalAruco objects.
+    # With give_reasoning=True, the reasoning is a FrameTrace; iterating it gives one list of strings per piece.
+    def process_image(self, image, give_reasoning: bool = False, compact: bool = False):
+        detections = self.detect(image, give_reasoning)
+        if compact:
+            return detections
+
+        return detections.pieces(), detections.anchors(), detections.reasoning
+
+    # Returns a FrameDetections for an image.
+    # With undistort="maps" the image is undistorted first, and the returned corners belong to the undistorted image (see undistort_image).
+    def detect(self, image, give_reasoning: bool = False):
+        size = self.calibration.size
+        frame_size = (image.shape[1], image.shape[0])
+        if size is not None and frame_size != size and frame_size != self.unscaled_size:
+            self.rescale_calibration(*frame_size)
+
+        if self.undistort != "maps":
+            return self.run_pipeline(image, give_reasoning) if self.motion_gate is None else self.gated_pipeline(image, give_reasoning)
+
+        start = time.perf_counter()
+        image = self.undistort_image(image)
+        undistorted = time.perf_counter()
+        detections = self.run_pipeline(image, give_reasoning) if self.motion_gate is None else self.gated_pipeline(image, give_reasoning)
+        self.last_timings["undistort"] = undistorted - start
+        self.last_timings["total"] = time.perf_counter() - start
+        return detections
+
+    # Switches to the calibration for width x height frames, rescaled from the current one.
+    # Everything carried over from earlier frames was in the old frame's pixels, so it is all forgotten.
+    # Frames with a different aspect ratio can't be rescaled for (the sensor is probably cropped), so the calibration is kept as it is.
+    def rescale_calibration(self, width: int, height: int):
+        if not self.calibration.same_aspect(width, height):
+            print(f"GamesFrame: {width}x{height} frames don't have the aspect ratio of the {self.calibration.size[0]}x{self.calibration.size[1]} calibration. Using it unscaled; calibrate the camera at this resolution for accurate poses.")
+            self.unscaled_size = (width, height)
+            return
+        self.unscaled_size = None
+        self.calibration = self.calibration.scaled_to(width, height)
+        self.cam_matrix = self.calibration.cam_matrix
+        self.undistort_maps = None
+        if self.pose_cache is not None:
+            self.pose_cache.cam_matrix = self.cam_matrix
+        for helper in (self.pose_cache, self.region_tracker, self.motion_gate, self.corner_tracker, self.marker_memory):
+            if helper is not None:
+                helper.reset()
+        self.last_detections = None
+        self.board_pose = None
+
+    # Returns the image as the rest of the pipeline sees it: remapped through the undistortion maps with undistort="maps", otherwise unchanged.
+    # Draw results on this image when using "maps", since that's the image their corners belong to.
+    def undistort_image(self, image):
+        if self.undistort != "maps":
+            return image
+
+        size = (image.shape[1], image.shape[0])
+        if self.undistort_maps is None or self.undistort_size != size:
+            # Keep the same camera matrix, so the undistorted image has the same intrinsics and zero distortion.
+            self.undistort_maps = cv2.initUndistortRectifyMap(self.cam_matrix, self.dist_coeff, None, self.cam_matrix, size, cv2.CV_16SC2)
+            self.undistort_size = size
+        return cv2.remap(image, self.undistort_maps[0], self.undistort_maps[1], cv2.INTER_LINEAR)
+
+    # Returns (N, 4, 2) corners with lens distortion removed, for pose estimation. Only "points" needs to do anything.
+    def undistort_corners(self, corners):
+        if self.undistort != "points" or len(corners) == 0:
+            return corners
+        points = cv2.undistortPoints(corners.reshape((-1, 1, 2)), self.cam_matrix, self.dist_coeff, P=self.cam_matrix)
+        return points.reshape((-1, 4, 2)).astype(np.float32)
 
-        # 2. Make DigitalAruco objects for everything.
-        anchors = []
-        pieces = []
-        reasoning = []
+    # Runs the pipeline behind the motion gate: returns the previous FrameDetections if the gate finds nothing has moved, otherwise a fresh one from run_pipeline.
+    # A reused result keeps the reasoning (if any) of the frame it came from.
+    def gated_pipeline(self, image, give_reasoning: bool = False):
+        start = time.perf_counter()
+        region = None if self.region_tracker is None else self.region_tracker.region_box
+        if self.last_detections is not None and not self.motion_gate.should_process(image, region):
+            self.frame_skipped = True
+            elapsed = time.perf_counter() - start
+            self.last_timings = {"gate": elapsed, "detect": 0.0, "pose": 0.0, "board": 0.0, "total": elapsed}
+            return self.last_detections
+        gate_time = time.perf_counter() - start
+
+        detections = self.run_pipeline(image, give_reasoning)
+        self.frame_skipped = False
+        self.last_detections = detections
+
+        # Compare later frames against this one, inside the region this frame found.
+        reference_start = time.perf_counter()
+        self.motion_gate.set_reference(image, None if self.region_tracker is None else self.region_tracker.region_box)
+        self.last_timings["gate"] = gate_time + (time.perf_counter() - reference_start)
+        self.last_timings["total"] = time.perf_counter() - start
+        return detections
+
+    # Runs the full pipeline on an image and returns a FrameDetections.
+    # Reasoning is only recorded when give_reasoning is set; otherwise no trace object exists at all.
+    def run_pipeline(self, image, give_reasoning: bool = False):
+        trace = FrameTrace() if give_reasoning else None
+        start = time.perf_counter()
+        timings = {"detect": 0.0, "pose": 0.0, "board": 0.0, "total": 0.0}
+        self.last_timings = timings
+        self.board_pose = None
+        self.frame_rejected = False
+
+        # 1. Pull out the arucos.
+        corners, ids, full_scan = self.find_markers(image)
+        self.last_full_scan = full_scan
+        detected = time.perf_counter()
+        timings["detect"] = detected - start
 
         if len(corners) == 0:
-            return pieces, anchors, reasoning
-
-        for (marker_corner, marker_id) in zip(corners, ids):
-            phys_aruco_info = self.board_info.aruco_info_for(marker_id)
-            if phys_aruco_info == None:
-                continue
-            if phys_aruco_info.anchored:
-                anchors.append(DigitalAruco(marker_corner, phys_aruco_info, self.cam_matrix, self.dist_coeff))
-            else:
-                pieces.append(DigitalAruco(marker_corner, phys_aruco_info, self.cam_matrix, self.dist_coeff))
+            detections = FrameDetections.empty(self.board_info, self.cam_matrix, self.image_dist_coeff)
+            detections.reasoning = trace
+            if self.pose_cache is not None:
+                detections.board_pose = self.pose_cache.reuse(detections.corners, [])
+                self.board_pose = detections.board_pose
+            if self.region_tracker is not None:
+                self.region_tracker.update(detections, image.shape, full_scan, self.cam_matrix, self.image_dist_coeff)
+            if self.marker_memory is not None:
+                self.marker_memory.remember(detections, detections.corners)
+            timings["total"] = time.perf_counter() - start
+            return detections
+
+        # 2. Split detections into anchors and pieces in one pass; markers that aren't part of this game are dropped.
+        anchor_indices, piece_indices = self.board_info.split_ids(ids)
+        known_indices = np.concatenate([anchor_indices, piece_indices])
+        known_ids = np.asarray(ids, dtype=np.int64).reshape(-1)[known_indices]
+        known_corners = np.asarray(corners, dtype=np.float32).reshape((-1, 4, 2))[known_indices]
+        anchored = np.arange(len(known_indices)) < len(anchor_indices)
+        sizes = np.array([self.board_info.aruco_by_id[marker_id].size for marker_id in known_ids], dtype=np.float64)
+        pose_corners = self.undistort_corners(known_corners)
+
+        rvecs = np.empty((len(known_ids), 3), dtype=np.float64)
+        tvecs = np.empty((len(known_ids), 3), dtype=np.float64)
+        needs_pose = np.ones(len(known_ids), dtype=bool)
+
+        # A usable cached board pose means the anchors don't need their own pose estimates: they follow from the board's.
+        cached_pose = None
+        if self.pose_cache is not None:
+            anchor_infos = [self.board_info.aruco_by_id[marker_id] for marker_id in known_ids[anchored]]
+            cached_pose = self.pose_cache.reuse(pose_corners[anchored], anchor_infos)
+            if cached_pose is not None:
+                rvecs[anchored], tvecs[anchored] = cached_pose.anchor_poses(anchor_infos)
+                needs_pose[anchored] = False
+
+        # Markers that haven't moved keep last frame's pose.
+        reused_from = None
+        if self.marker_memory is not None:
+            reused_from = self.marker_memory.match(known_ids, known_corners)
+            reused = (reused_from >= 0) & needs_pose
+            if np.any(reused):
+                rvecs[reused] = self.marker_memory.previous.rvecs[reused_from[reused]]
+                tvecs[reused] = self.marker_memory.previous.tvecs[reused_from[reused]]
+                needs_pose[reused] = False
+
+        if np.any(needs_pose):
+            rvecs[needs_pose], tvecs[needs_pose] = self.estimate_poses(pose_corners[needs_pose], sizes[needs_pose])
+
+        detections = FrameDetections(known_ids, known_corners, anchored, rvecs, tvecs, self.board_info, self.cam_matrix, self.image_dist_coeff)
+        detections.pose_corners = pose_corners
+        detections.board_pose = cached_pose
+        if reused_from is not None:
+            detections.reused_from = reused_from
+        posed = time.perf_counter()
+        timings["pose"] = posed - detected
 
         # 3. Define piece positions.
-        if len(anchors) > 0:
-            for aru in pieces:
-                #print(aru)
-                _, reason = aru.to_board_position(anchors, self.board_info, give_reasoning)
-                reasoning.append(reason)
-
-        if not give_reasoning:
-            return pieces, anchors, None
+        self.locate_pieces(detections, trace)
+        detections.reasoning = trace
+        self.board_pose = detections.board_pose
+        self.frame_rejected = detections.rejected
+        if self.region_tracker is not None:
+            self.region_tracker.update(detections, image.shape, full_scan, self.cam_matrix, self.image_dist_coeff)
+        if self.marker_memory is not None:
+            # Reused markers keep the corners their pose was estimated at, so small movements can't add up unnoticed.
+            reference_corners = known_corners.copy()
+            reused = detections.reused_from >= 0
+            reference_corners[reused] = self.marker_memory.reference_corners[detections.reused_from[reused]]
+            self.marker_memory.remember(detections, reference_corners)
+        timings["board"] = time.perf_counter() - posed
+        timings["total"] = time.perf_counter() - start
+
+        return detections
+
+    # Finds this frame's markers and returns (corners, ids, full_scan).
+    # With optical_flow on, the last frame's corners are tracked into this one when possible; otherwise the detector runs.
+    def find_markers(self, image):
+        self.last_tracked = False
+        if self.corner_tracker is None:
+            return self.search_markers(image)
+
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if not self.corner_tracker.detection_due():
+            tracked = self.corner_tracker.track(gray)
+            if tracked is not None:
+                self.last_tracked = True
+                corners, ids = tracked
+                return corners, ids, False
+
+        corners, ids, full_scan = self.search_markers(image)
+        self.corner_tracker.remember(gray, corners, ids)
+        return corners, ids, full_scan
+
+    # Runs the ArUco detector and returns (corners, ids, full_scan).
+    # With tracking on, only the board's region from the last frame is searched; the whole frame is searched instead
+    # when a periodic full scan is due or when the region is missing anchors the last frame had.
+    def search_markers(self, image):
+        region = self.region_tracker.region() if self.tracking else None
+        if region is not None:
+            x0, y0, x1, y1 = region
+            corners, ids = self.detect_markers(image[y0:y1, x0:x1])
+            if not self.region_tracker.lost_markers(ids):
+                # Shift the corners back into full-image pixels.
+                offset = np.array([x0, y0], dtype=np.float32)
+                return [marker_corners + offset for marker_corners in corners], ids, False
+
+        corners, ids = self.detect_markers(image)
+        return corners, ids, True
+
+    # Runs the ArUco detector on an image (at detection_scale) and returns (corners, ids) in the image's own pixels, with original ArUco ids.
+    def detect_markers(self, image):
+        if self.detection_scale == 1.0:
+            (corners, ids, rejected) = self.detector.detectMarkers(image)
+            return corners, self.original_ids(ids)
+
+        small = cv2.resize(image, None, fx=self.detection_scale, fy=self.detection_scale, interpolation=cv2.INTER_AREA)
+        (corners, ids, rejected) = self.detector.detectMarkers(small)
+        ids = self.original_ids(ids)
+        if len(corners) == 0:
+            return corners, ids
+
+        # Map pixel centers of the small image back onto the full one.
+        full_corners = [(marker_corners + 0.5) / self.detection_scale - 0.5 for marker_corners in corners]
+        return self.refine_corners(image, full_corners), ids
+
+    # Converts ids reported by the detector into original ArUco ids.
+    def original_ids(self, ids):
+        if ids is None or self.dictionary_ids is None:
+            return ids
+        return self.dictionary_ids[ids]
+
+    # Refines (1, 4, 2) marker corners to sub-pixel accuracy, converting only a small patch around each marker to grayscale.
+    # Corners that drift further than the refine window are treated as failed refinements and left where they were.
+    def refine_corners(self, image, corners):
+        height, width = image.shape[:2]
+        window = self.refine_window
+        refined = []
+        for marker_corners in corners:
+            points = np.asarray(marker_corners, dtype=np.float32).reshape((4, 2))
+            x0, y0 = np.maximum(np.floor(points.min(axis=0)).astype(int) - window - 2, 0)
+            x1, y1 = np.minimum(np.ceil(points.max(axis=0)).astype(int) + window + 3, [width, height])
+            patch = image[y0:y1, x0:x1]
+            if patch.ndim == 3:
+                patch = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+
+            offset = np.array([x0, y0], dtype=np.float32)
+            local = (points - offset).reshape((4, 1, 2))
+            cv2.cornerSubPix(patch, local, (window, window), (-1, -1), self.refine_criteria)
+            moved = local.reshape((4, 2)) + offset
+            moved_too_far = np.any(np.abs(moved - points) > window, axis=1)
+            moved[moved_too_far] = points[moved_too_far]
+            refined.append(moved.reshape((1, 4, 2)))
+        return refined
+
+    # Fills in the board positions of every piece in a FrameDetections, using the configured board_solver.
+    # A board_pose already set on the detections (e.g. from the pose cache) is used as-is instead of solving a new one.
+    # If a FrameTrace is given, the data behind each decision is recorded into it.
+    def locate_pieces(self, detections: FrameDetections, trace: FrameTrace = None):
+        anchor_rows = np.flatnonzero(detections.anchored)
+        piece_rows = np.flatnonzero(~detections.anchored)
+        piece_ids = detections.ids[piece_rows]
+
+        if len(anchor_rows) == 0 and detections.board_pose is None:
+            return
+
+        # Which pieces need snapping to the board; None means all of them.
+        fresh = None
+
+        anchor_infos = [detections.phys(i) for i in anchor_rows]
+        if self.board_solver == "fused" and detections.board_pose is None:
+            detections.board_pose = BoardPose.solve(detections.pose_corners[anchor_rows], anchor_infos, self.board_info.cm_to_space, self.cam_matrix, self.pose_dist_coeff)
+            if self.pose_cache is not None:
+                detections.board_pose = self.pose_cache.update(detections.board_pose, detections.pose_corners[anchor_rows], anchor_infos)
+
+        if detections.board_pose is None:
+            rebased, estimates, weights, positions = locate_from_anchors(
+                detections.rvecs[anchor_rows],
+                detections.tvecs[anchor_rows],
+                detections.exact_positions[anchor_rows],
+                detections.tvecs[piece_rows],
+                self.board_info.cm_to_space
+            )
+            if trace is not None:
+                trace.record("anchor_estimates", piece_ids=piece_ids, anchor_ids=[info.id for info in anchor_infos], rebased=rebased, estimates=estimates, cm_to_space=self.board_info.cm_to_space)
+        elif self.max_reprojection_error is not None and detections.board_pose.reprojection_error > self.max_reprojection_error:
+            # The anchors disagree about where the board is, so no piece position from this frame can be trusted.
+            detections.rejected = True
+            if trace is not None:
+                trace.record("rejected", board_pose=detections.board_pose)
+            return
         else:
-            return pieces, anchors, reasoning
\ No newline at end of file
+            # Map every piece through the single board pose.
+            # Pieces that kept last frame's pose keep last frame's position too, as long as the board pose is exactly the same.
+            if self.marker_memory is not None and self.marker_memory.same_board(detections.board_pose):
+                previous = self.marker_memory.previous
+                previous_rows = detections.reused_from[piece_rows]
+                fresh = previous_rows < 0
+                positions = np.empty((len(piece_rows), 2), dtype=np.float64)
+                positions[~fresh] = previous.exact_positions[previous_rows[~fresh]]
+                positions[fresh] = detections.board_pose.to_board(detections.tvecs[piece_rows[fresh]])
+                detections.closest_indices[piece_rows[~fresh]] = previous.closest_indices[previous_rows[~fresh]]
+            else:
+                positions = detections.board_pose.to_board(detections.tvecs[piece_rows])
+            if trace is not None:
+                trace.record("pose_positions", piece_ids=piece_ids, board_pose=detections.board_pose, positions=positions)
+
+        detections.exact_positions[piece_rows] = positions
+        if fresh is None:
+            fresh = np.ones(len(piece_rows), dtype=bool)
+        if np.any(fresh):
+            detections.closest_indices[piece_rows[fresh]] = self.board_info.closest_valid_indices(positions[fresh])
+
+    # Estimates the pose of every marker in one call per distinct marker size.
+    # corners is a list or array of (1, 4, 2) corner arrays (already undistorted unless undistort is "none"); sizes holds each marker's edge length.
+    # Returns (N, 3) arrays of rvecs and tvecs in the same order as corners.
+    def estimate_poses(self, corners, sizes):
+        count = len(corners)
+        rvecs = np.empty((count, 3), dtype=np.float64)
+        tvecs = np.empty((count, 3), dtype=np.float64)
+        if count == 0:
+            return rvecs, tvecs
+
+        # Anchors and pieces usually have different sizes, so this is typically two calls per frame.
+        stacked = np.asarray(corners, dtype=np.float32).reshape((count, 1, 4, 2))
+        unique_sizes, group_of = np.unique(np.asarray(sizes, dtype=np.float64), return_inverse=True)
+        for group, size in enumerate(unique_sizes):
+            members = np.flatnonzero(group_of == group)
+            group_rvecs, group_tvecs, _ = aruco.estimatePoseSingleMarkers(stacked[members], size, self.cam_matrix, self.pose_dist_coeff)
+            rvecs[members] = group_rvecs.reshape((-1, 3))
+            tvecs[members] = group_tvecs.reshape((-1, 3))
+
+        return rvecs, tvecs
@@ -0,0 +1,62 @@
+# A MarkerMemory remembers every marker from the previous frame, so markers that haven't moved can reuse their results.
+# In a static position only the piece being played moves, so most markers' poses (and, with an unchanged board pose,
+# their board positions) are the same as last frame. Reusing them makes a frame's cost depend on what changed rather than on piece count.
+# Markers are matched by id and then by nearest corners, since several pieces can share an id (e.g. Dao).
+# GamesFrame uses one of these when it is created with reuse_threshold set.
+
+import numpy as np
+
+class MarkerMemory:
+    def __init__(self, threshold: float = 0.5):
+        if threshold <= 0:
+            raise Exception("MarkerMemory: threshold must be greater than 0.")
+
+        # Furthest (in pixels) any corner of a marker may be from where its pose was last estimated for that pose to be reused.
+        self.threshold = threshold
+
+        self.reset()
+
+    # Forgets the previous frame.
+    def reset(self):
+        self.previous = None
+
+        # (N, 4, 2) corners each of the previous frame's markers had when its pose was actually estimated.
+        # Comparing against these rather than last frame's corners stops slow drift from being reused forever.
+        self.reference_corners = np.zeros((0, 4, 2), dtype=np.float32)
+
+    # Matches this frame's markers to the previous frame's.
+    # Returns an (N,) array holding, for each marker, its row in the previous frame's FrameDetections, or -1 if it moved or is new.
+    def match(self, ids, corners):
+        count = len(ids)
+        matches = np.full(count, -1, dtype=np.int64)
+        if self.previous is None or count == 0 or len(self.previous) == 0:
+            return matches
+
+        # Largest corner movement between every (current, previous) pair; pairs with different ids can never match.
+        movement = np.linalg.norm(corners[:, None, :, :] - self.reference_corners[None, :, :, :], axis=3).max(axis=2)
+        movement[ids[:, None] != self.previous.ids[None, :]] = np.inf
+
+        # Greedily pair the closest markers first, so each previous marker is reused at most once.
+        taken = np.zeros(len(self.previous), dtype=bool)
+        for flat_index in np.argsort(movement, axis=None):
+            current, previous = np.unravel_index(flat_index, movement.shape)
+            if movement[current, previous] >= self.threshold:
+                break
+            if matches[current] < 0 and not taken[previous]:
+                matches[current] = previous
+                taken[previous] = True
+
+        return matches
+
+    # Returns True if board positions from the previous frame are still valid under board_pose.
+    # That only holds when the board pose is exactly the same, e.g. when it came from the pose cache.
+    def same_board(self, board_pose):
+        if self.previous is None or self.previous.rejected or board_pose is None or self.previous.board_pose is None:
+            return False
+        return np.array_equal(board_pose.rvec, self.previous.board_pose.rvec) and np.array_equal(board_pose.tvec, self.previous.board_pose.tvec)
+
+    # Stores this frame's FrameDetections for the next frame to match against.
+    # reference_corners are the corners each marker's pose was estimated at (its current corners unless it was reused).
+    def remember(self, detections, reference_corners):
+        self.previous = detections
+        self.reference_corners = reference_corners
@@ -0,0 +1,72 @@
+# A MotionGate decides whether a frame is worth processing.
+# Most of the time nothing on the board moves, so a frame that looks the same as the last processed one
+# can reuse its result instead of going through detection, pose estimation and board mapping again.
+# The check is a difference of small grayscale thumbnails, taken inside the board's region when one is known.
+# A frame is processed anyway once max_stale_frames frames in a row have been skipped.
+# GamesFrame uses one of these when it is created with motion_gate=True.
+
+import cv2
+import numpy as np
+
+class MotionGate:
+    def __init__(self, downsample: int = 8, pixel_threshold: int = 16, changed_fraction: float = 0.002, max_stale_frames: int = 30):
+        if downsample < 1:
+            raise Exception("MotionGate: downsample must be at least 1.")
+        if max_stale_frames < 0:
+            raise Exception("MotionGate: max_stale_frames must not be negative.")
+
+        # Thumbnails are 1/downsample the size of the region in each direction.
+        self.downsample = downsample
+
+        # How much (0-255) a thumbnail pixel must change to count as changed, and what fraction of them must change to count as motion.
+        # The pixel threshold ignores sensor noise; the fraction ignores a few flickering pixels.
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+
+        # Most frames in a row that may reuse an old result.
+        self.max_stale_frames = max_stale_frames
+
+        self.reset()
+
+    # Forgets the reference frame, so the next frame is always processed.
+    def reset(self):
+        self.reference = None
+        self.reference_region = None
+        self.stale_frames = 0
+
+        # Fraction of thumbnail pixels that changed in the last check (None if there was nothing to compare against).
+        self.last_change = None
+
+    # Returns a small grayscale copy of image, cropped to region (x0, y0, x1, y1) if given.
+    def thumbnail(self, image, region=None):
+        if region is not None:
+            x0, y0, x1, y1 = region
+            image = image[y0:y1, x0:x1]
+        height, width = image.shape[:2]
+        size = (max(width // self.downsample, 1), max(height // self.downsample, 1))
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    # Returns True if image should be processed: there is no reference yet, the region changed,
+    # enough of the scene moved since the reference, or the last result has been reused for too long.
+    # Otherwise counts one more stale frame and returns False.
+    def should_process(self, image, region=None):
+        self.last_change = None
+        if self.reference is None or region != self.reference_region or self.stale_frames >= self.max_stale_frames:
+            return True
+
+        difference = cv2.absdiff(self.thumbnail(image, region), self.reference)
+        self.last_change = float(np.count_nonzero(difference > self.pixel_threshold)) / difference.size
+        if self.last_change > self.changed_fraction:
+            return True
+
+        self.stale_frames += 1
+        return False
+
+    # Makes image the reference that later frames are compared against. Call it after processing a frame.
+    def set_reference(self, image, region=None):
+        self.reference = self.thumbnail(image, region)
+        self.reference_region = region
+        self.stale_frames = 0
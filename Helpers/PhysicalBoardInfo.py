@@ -2,6 +2,7 @@
 # This includes where the arucos are, where pieces may be placed, and how many cm translates to one space unit.
 
 from .PhysicalAruco import PhysicalAruco
+from .PositionIndex import PositionIndex
 import numpy as np
 
 class PhysicalBoardInfo:
@@ -22,31 +23,54 @@ class PhysicalBoardInfo:
         # Where pieces may be located on the board, in board units.
         self.valid_board_positions = valid_board_positions
 
+        # Precomputed lookup structure for snapping to the closest valid position.
+        self.position_index = PositionIndex(valid_board_positions)
+
         # How many cm converts to one board unit.
         self.cm_to_space = cm_to_space
 
+        # Dense lookup tables indexed by ArUco id, so detections can be classified without scanning.
+        # If several PhysicalArucos share an id, the first one (pieces before anchors) wins, as in aruco_info_for.
+        table_size = max(aru.id for aru in unanchored_arucos + anchored_arucos) + 1
+        self.aruco_by_id = [None] * table_size
+        self.known_ids = np.zeros(table_size, dtype=bool)
+        self.anchored_ids = np.zeros(table_size, dtype=bool)
+        for aru in unanchored_arucos + anchored_arucos:
+            if self.aruco_by_id[aru.id] is None:
+                self.aruco_by_id[aru.id] = aru
+                self.known_ids[aru.id] = True
+                self.anchored_ids[aru.id] = aru.anchored
+
         return
     
     # Given an id, returns its PhysicalAruco information.
     def aruco_info_for(self, id):
-        for aru in self.unanchored_arucos + self.anchored_arucos:
-            if aru.id == id:
-                return aru
+        # Detected ids arrive as one-element arrays.
+        id = int(np.asarray(id).item())
+        if id < 0 or id >= len(self.aruco_by_id):
+            return None
 
-        return None
+        return self.aruco_by_id[id]
         #raise Exception(f"PhysicalBoardInfo: ArUco ID {id} does not exist in this context.")
 
+    # Given the ids array from a detection, returns (anchor_indices, piece_indices): the positions in ids of anchors and of pieces.
+    # Ids that are not part of this board appear in neither.
+    def split_ids(self, ids):
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        in_table = (ids >= 0) & (ids < len(self.known_ids))
+        safe_ids = np.where(in_table, ids, 0)
+        known = in_table & self.known_ids[safe_ids]
+        anchored = known & self.anchored_ids[safe_ids]
+        return np.flatnonzero(anchored), np.flatnonzero(known & ~anchored)
+
     # Given an X, Y board position (in board units, not cm), returns the closest valid_board_position.
     def closest_valid_space(self, board_position):
-        if len(self.valid_board_positions) == 1:
-            return self.valid_board_positions[0]
-
-        min_distance = 9999999
-        closest_pos = None
-        for pos in self.valid_board_positions[0:]:
-            distance = np.linalg.norm(np.array(board_position) - np.array(pos))
-            if distance < min_distance:
-                min_distance = distance
-                closest_pos = pos
-
-        return closest_pos
\ No newline at end of file
+        return self.position_index.closest(board_position)
+
+    # Batch version of closest_valid_space: snaps every (X, Y) board position in one call.
+    def closest_valid_spaces(self, board_positions):
+        return self.position_index.closest_many(board_positions)
+
+    # Like closest_valid_spaces, but returns indices into valid_board_positions as an array.
+    def closest_valid_indices(self, board_positions):
+        return self.position_index.query(board_positions)
@@ -0,0 +1,93 @@
+# A PoseCache keeps the board pose from earlier frames so it doesn't have to be solved from the anchors every frame.
+# Anchors are glued to the board, so the board pose barely changes between frames. The cached pose is:
+# - reused while it still lands on the visible anchors (within refresh_error pixels), for up to refresh_interval frames,
+# - blended with each freshly solved pose to smooth out detection jitter,
+# - used on its own for up to max_age frames when every anchor is hidden (e.g. by a player's arm).
+# GamesFrame uses one of these when it is created with pose_cache=True.
+
+import numpy as np
+from .BoardPose import BoardPose
+
+class PoseCache:
+    def __init__(self, cam_matrix, dist_coeff, cm_to_space: float, refresh_interval: int = 10, refresh_error: float = 2.0, smoothing: float = 0.5, max_age: int = 90):
+        if refresh_interval < 1:
+            raise Exception("PoseCache: refresh_interval must be at least 1.")
+        if not 0 < smoothing <= 1:
+            raise Exception("PoseCache: smoothing must be in (0, 1].")
+
+        self.cam_matrix = cam_matrix
+        self.dist_coeff = dist_coeff
+        self.cm_to_space = cm_to_space
+
+        # Frames the cached pose may be reused before it is solved again from the anchors.
+        self.refresh_interval = refresh_interval
+
+        # RMS pixels by which the cached pose may miss the visible anchors before it is solved again.
+        self.refresh_error = refresh_error
+
+        # Weight of a freshly solved pose when blending it into the cached one. 1 disables smoothing.
+        self.smoothing = smoothing
+
+        # Frames the cached pose may be used with no anchors visible at all.
+        self.max_age = max_age
+
+        self.reset()
+
+    # Forgets the cached pose.
+    def reset(self):
+        self.pose = None
+        self.frames_since_refresh = 0
+
+        # Whether the pose returned by the last reuse() call came from the cache.
+        self.reused = False
+
+    # Returns the cached pose if it can stand in for solving a new one this frame, otherwise None.
+    # anchor_corners and anchor_infos describe the anchors visible in this frame (possibly none).
+    # The returned pose's reprojection_error is measured against this frame's anchors.
+    def reuse(self, anchor_corners, anchor_infos):
+        self.reused = False
+        if self.pose is None:
+            return None
+
+        if len(anchor_infos) == 0:
+            # Nothing to check the cache against; trust it until it gets too old.
+            if self.frames_since_refresh >= self.max_age:
+                return None
+            self.frames_since_refresh += 1
+            self.reused = True
+            return BoardPose(self.pose.rvec, self.pose.tvec, self.pose.reprojection_error, self.pose.anchor_ids, self.cm_to_space, cached=True)
+
+        if self.frames_since_refresh >= self.refresh_interval:
+            return None
+
+        error = self.pose.reprojection_error_for(anchor_corners, anchor_infos, self.cam_matrix, self.dist_coeff)
+        if error > self.refresh_error:
+            return None
+
+        self.frames_since_refresh += 1
+        self.reused = True
+        return BoardPose(self.pose.rvec, self.pose.tvec, error, [info.id for info in anchor_infos], self.cm_to_space, cached=True)
+
+    # Folds a pose freshly solved from anchor_corners into the cache, and returns the pose to use for this frame.
+    # The fresh pose is blended with the cached one unless the blend fits the anchors noticeably worse,
+    # which means the board really moved and the old pose should be dropped.
+    def update(self, fresh_pose: BoardPose, anchor_corners, anchor_infos):
+        if fresh_pose is None:
+            return None
+        self.frames_since_refresh = 0
+
+        if self.pose is None or self.smoothing >= 1:
+            self.pose = fresh_pose
+            return fresh_pose
+
+        # Poses this close together are fine to blend component-wise, rotation vector included.
+        rvec = self.smoothing * fresh_pose.rvec + (1 - self.smoothing) * self.pose.rvec
+        tvec = self.smoothing * fresh_pose.tvec + (1 - self.smoothing) * self.pose.tvec
+        blended = BoardPose(rvec, tvec, 0.0, fresh_pose.anchor_ids, self.cm_to_space)
+        blended.reprojection_error = blended.reprojection_error_for(anchor_corners, anchor_infos, self.cam_matrix, self.dist_coeff)
+
+        if blended.reprojection_error > max(self.refresh_error, fresh_pose.reprojection_error):
+            self.pose = fresh_pose
+        else:
+            self.pose = blended
+        return self.pose
@@ -0,0 +1,153 @@
+# A PositionIndex answers "which valid board position is closest to this point?" without scanning every position.
+# It is built once per board from valid_board_positions:
+# - Square/rectangular grids (and hex boards, which are two offset grids) snap in O(1) by rounding.
+# - Irregular layouts (e.g. Dodgem's) use a KD-tree, or a vectorized scan if scipy is unavailable.
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+class PositionIndex:
+    # At most this many offset grids still counts as a lattice (1 for square boards, 2 for hex boards).
+    MAX_GRIDS = 2
+
+    def __init__(self, positions: list[(float, float)]):
+        if len(positions) == 0:
+            raise Exception("PositionIndex: You must supply at least one position.")
+
+        # The original position objects, so queries return exactly what the board was given.
+        self.positions = positions
+        self.points = np.asarray(positions, dtype=np.float64).reshape((-1, 2))
+
+        # Spacing below this is treated as equal, to absorb float noise in hand-typed coordinates.
+        extent = float(np.ptp(self.points, axis=0).max()) if len(self.points) > 1 else 1.0
+        self.tolerance = max(extent, 1.0) * 1e-6
+
+        self.grids = None
+        self.tree = None
+        if len(self.points) == 1:
+            self.kind = "single"
+            return
+
+        self.grids = self._find_grids(self.points)
+        if self.grids is None:
+            # Hex boards may be offset by column rather than by row.
+            swapped = self._find_grids(self.points[:, ::-1])
+            if swapped is not None:
+                self.grids = [(origin[::-1], step[::-1], shape[::-1], lookup.T) for origin, step, shape, lookup in swapped]
+
+        if self.grids is not None:
+            self.kind = "lattice"
+        elif cKDTree is not None:
+            self.kind = "tree"
+            self.tree = cKDTree(self.points)
+        else:
+            self.kind = "scan"
+
+    # Splits the points into full rectangular grids by row pattern.
+    # Returns a list of (origin, step, shape, lookup) per grid, or None if the points are not a lattice.
+    # lookup[ix, iy] is the index into self.points of grid cell (ix, iy).
+    def _find_grids(self, points):
+        rows = self._group(points[:, 1], points)
+
+        # Rows sharing the same x pattern belong to the same grid.
+        patterns = {}
+        for y, row in rows:
+            xs = np.sort(row[:, 0])
+            step = self._even_step(xs)
+            if step is None:
+                return None
+            key = (round(xs[0] / self.tolerance), len(xs), round(step / self.tolerance))
+            patterns.setdefault(key, []).append((y, xs[0], step, len(xs)))
+
+        if len(patterns) > self.MAX_GRIDS:
+            return None
+
+        grids = []
+        for members in patterns.values():
+            ys = np.array(sorted(y for y, _, _, _ in members))
+            y_step = self._even_step(ys)
+            if y_step is None:
+                return None
+            _, x0, x_step, x_count = members[0]
+
+            origin = np.array([x0, ys[0]])
+            step = np.array([x_step, y_step])
+            shape = np.array([x_count, len(ys)])
+
+            # Map every cell back to its position index.
+            lookup = np.full((x_count, len(ys)), -1, dtype=np.int64)
+            cells = self._cell_of(points, origin, step, shape)
+            on_grid = np.all(np.abs(origin + cells * np.where(step > 0, step, 0) - points) <= self.tolerance, axis=1)
+            for index in np.flatnonzero(on_grid):
+                if lookup[cells[index][0], cells[index][1]] == -1:
+                    lookup[cells[index][0], cells[index][1]] = index
+            if np.any(lookup == -1):
+                return None
+            grids.append((origin, step, shape, lookup))
+
+        return grids
+
+    # Groups points by one coordinate. Returns [(value, points_with_that_value)] sorted by value.
+    def _group(self, values, points):
+        order = np.argsort(values, kind="stable")
+        groups = []
+        start = 0
+        for i in range(1, len(order) + 1):
+            if i == len(order) or values[order[i]] - values[order[start]] > self.tolerance:
+                groups.append((values[order[start]], points[order[start:i]]))
+                start = i
+        return groups
+
+    # Returns the common spacing of sorted values, 0 for a single value, or None if unevenly spaced.
+    def _even_step(self, values):
+        if len(values) == 1:
+            return 0.0
+        gaps = np.diff(values)
+        if np.any(np.abs(gaps - gaps[0]) > self.tolerance) or gaps[0] <= self.tolerance:
+            return None
+        return float(gaps[0])
+
+    # Rounds points to their nearest cell in a grid, clamped to the grid's edges.
+    def _cell_of(self, points, origin, step, shape):
+        safe_step = np.where(step > 0, step, 1.0)
+        cells = np.rint((points - origin) / safe_step).astype(np.int64)
+        return np.clip(cells, 0, shape - 1)
+
+    # Returns the index of the closest position for each of the (M, 2) query points.
+    def query(self, board_positions):
+        queries = np.asarray(board_positions, dtype=np.float64).reshape((-1, 2))
+
+        if self.kind == "single":
+            return np.zeros(len(queries), dtype=np.int64)
+
+        if self.kind == "tree":
+            _, indices = self.tree.query(queries)
+            return np.asarray(indices, dtype=np.int64)
+
+        if self.kind == "scan":
+            distances = np.linalg.norm(queries[:, None, :] - self.points[None, :, :], axis=2)
+            return np.argmin(distances, axis=1)
+
+        # Nearest cell in each grid, then the nearest of those.
+        best = np.zeros(len(queries), dtype=np.int64)
+        best_distance = np.full(len(queries), np.inf)
+        for origin, step, shape, lookup in self.grids:
+            cells = self._cell_of(queries, origin, step, shape)
+            candidates = lookup[cells[:, 0], cells[:, 1]]
+            distances = np.linalg.norm(self.points[candidates] - queries, axis=1)
+            closer = distances < best_distance
+            best[closer] = candidates[closer]
+            best_distance[closer] = distances[closer]
+        return best
+
+    # Returns the closest position to a single point.
+    def closest(self, board_position):
+        return self.positions[int(self.query(board_position)[0])]
+
+    # Returns the closest position to each point.
+    def closest_many(self, board_positions):
+        return [self.positions[i] for i in self.query(board_positions)]
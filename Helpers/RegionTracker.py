@@ -0,0 +1,91 @@
+# A RegionTracker remembers where the board was in the last frame, so the next frame only needs to be searched there.
+# Tables don't move between frames, so once the anchors are found, detection can be restricted to the board's
+# bounding box (plus a margin) instead of scanning the whole image.
+# A full-frame scan still happens every full_scan_interval frames, and immediately whenever anchors go missing.
+# Pieces are free to leave the board, so a piece moved out of the region is only picked up again by the next full scan.
+# GamesFrame uses one of these when it is created with tracking=True.
+
+import numpy as np
+from .PhysicalBoardInfo import PhysicalBoardInfo
+from .BoardPose import BoardPose
+
+class RegionTracker:
+    def __init__(self, board_info: PhysicalBoardInfo, margin: float = 1.0, full_scan_interval: int = 30):
+        if margin < 0:
+            raise Exception("RegionTracker: margin must not be negative.")
+        if full_scan_interval < 1:
+            raise Exception("RegionTracker: full_scan_interval must be at least 1.")
+
+        self.board_info = board_info
+
+        # Extra board units searched around the board, so pieces just off the playing area are still found.
+        self.margin = margin
+
+        # Frames between forced full-frame scans.
+        self.full_scan_interval = full_scan_interval
+
+        # The board's outline in board units: every anchor and valid position, padded by the margin and the largest marker.
+        positions = np.array(list(board_info.valid_board_positions) + [aru.board_position for aru in board_info.anchored_arucos], dtype=np.float64).reshape((-1, 2))
+        largest_marker = max(aru.size for aru in board_info.unanchored_arucos + board_info.anchored_arucos) / board_info.cm_to_space
+        pad = margin + largest_marker
+        low = positions.min(axis=0) - pad
+        high = positions.max(axis=0) + pad
+        self.board_outline = np.array([
+            [low[0], high[1]],
+            [high[0], high[1]],
+            [high[0], low[1]],
+            [low[0], low[1]],
+        ])
+
+        self.reset()
+
+    # Forgets the board's region, so the next frame gets a full scan.
+    def reset(self):
+        # (x0, y0, x1, y1) pixel box to search next, or None for a full scan.
+        self.region_box = None
+        self.frames_since_full_scan = 0
+
+        # How many anchors the last frame had; finding fewer in the region means the region is off or something is in the way.
+        self.expected_anchors = 0
+
+    # Returns the (x0, y0, x1, y1) pixel box to search in this frame, or None if this frame needs a full scan.
+    def region(self):
+        if self.region_box is None or self.frames_since_full_scan >= self.full_scan_interval:
+            return None
+        return self.region_box
+
+    # Returns True if a detection of the region found fewer anchors than the last frame did,
+    # in which case the frame should be re-scanned in full.
+    def lost_markers(self, ids):
+        if ids is None or len(ids) == 0:
+            return True
+        anchor_indices, _ = self.board_info.split_ids(ids)
+        return len(anchor_indices) < self.expected_anchors
+
+    # Records the outcome of a frame and works out the region to search in the next one.
+    # image_shape is the processed image's shape; full_scan says whether this frame was scanned in full.
+    def update(self, detections, image_shape, full_scan: bool, cam_matrix, dist_coeff):
+        self.frames_since_full_scan = 0 if full_scan else self.frames_since_full_scan + 1
+        self.expected_anchors = int(np.sum(detections.anchored))
+
+        # The region comes from the board pose; the "anchors" solver doesn't solve one, so do it here.
+        board_pose = detections.board_pose
+        if board_pose is None and self.expected_anchors > 0:
+            anchor_rows = np.flatnonzero(detections.anchored)
+            board_pose = BoardPose.solve(detections.corners[anchor_rows], [detections.phys(i) for i in anchor_rows], self.board_info.cm_to_space, cam_matrix, dist_coeff)
+
+        if board_pose is None:
+            self.region_box = None
+            return
+
+        outline = board_pose.to_image(self.board_outline, cam_matrix, dist_coeff)
+        if not np.all(np.isfinite(outline)):
+            self.region_box = None
+            return
+
+        height, width = image_shape[:2]
+        x0, y0 = np.floor(outline.min(axis=0)).astype(int)
+        x1, y1 = np.ceil(outline.max(axis=0)).astype(int)
+        x0, x1 = max(x0, 0), min(x1, width)
+        y0, y1 = max(y0, 0), min(y1, height)
+        self.region_box = (int(x0), int(y0), int(x1), int(y1)) if x1 > x0 and y1 > y0 else None
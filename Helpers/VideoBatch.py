@@ -0,0 +1,140 @@
+# Processes recorded video offline using every CPU core.
+# Frames are decoded in the main process and fanned out to a pool of worker processes, each with its own game and GamesFrame.
+# Results come back in frame order and are written to a .jsonl (one frame per line) or .npz (flat arrays) file.
+# To use it:
+#   stats = process_video("session.mp4", DummyGame, calibration, "session.jsonl")
+# where DummyGame is any GamesPlaneGame subclass whose constructor takes the camera calibration (use functools.partial to pass it other settings),
+# and calibration is a Calibration (see Helpers/Calibration.py) or the camera yaml. A Calibration is sent to the workers already parsed.
+
+import os
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from .FrameSource import open_source
+
+# Each worker process builds its game once, in _init_worker, and keeps it here.
+_worker_game = None
+_worker_scale = 1.0
+
+def _init_worker(game_factory, camera_yaml: str, scale: float):
+    global _worker_game, _worker_scale
+    # The pool already uses every core; OpenCV's own thread pool would only compete with the other workers.
+    cv2.setNumThreads(1)
+    _worker_game = game_factory(camera_yaml)
+    _worker_scale = scale
+
+# Runs one frame through the worker's GamesFrame. Returns (frame_index, result dict).
+def _process_frame(frame_index: int, timestamp: float, frame):
+    if _worker_scale != 1.0:
+        frame = cv2.resize(frame, None, fx=_worker_scale, fy=_worker_scale)
+
+    detections = _worker_game.gframe.process_image(frame, compact=True)
+    result = detections.to_dict()
+    result["frame"] = frame_index
+    result["timestamp"] = timestamp
+    result["timings"] = dict(_worker_game.gframe.last_timings)
+    return frame_index, result
+
+# Writes results one frame per line as they arrive.
+class JsonlWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w")
+
+    def write(self, result: dict):
+        self.file.write(json.dumps(result) + "\n")
+
+    def close(self):
+        self.file.close()
+
+# Collects results and writes them to one .npz at the end.
+# Per-marker arrays are flattened across frames; marker_frame says which frame each row came from.
+class NpzWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.results = []
+
+    def write(self, result: dict):
+        self.results.append(result)
+
+    def close(self):
+        marker_frame = [r["frame"] for r in self.results for _ in r["ids"]]
+        rows = [(r, i) for r in self.results for i in range(len(r["ids"]))]
+        np.savez_compressed(
+            self.path,
+            frame=np.array([r["frame"] for r in self.results], dtype=np.int64),
+            timestamp=np.array([r["timestamp"] for r in self.results], dtype=np.float64),
+            reprojection_error=np.array([np.nan if r["reprojection_error"] is None else r["reprojection_error"] for r in self.results], dtype=np.float64),
+            rejected=np.array([r["rejected"] for r in self.results], dtype=bool),
+            marker_frame=np.array(marker_frame, dtype=np.int64),
+            ids=np.array([r["ids"][i] for r, i in rows], dtype=np.int64),
+            anchored=np.array([r["anchored"][i] for r, i in rows], dtype=bool),
+            corners=np.array([r["corners"][i] for r, i in rows], dtype=np.float32).reshape((-1, 4, 2)),
+            rvecs=np.array([r["rvecs"][i] for r, i in rows], dtype=np.float64).reshape((-1, 3)),
+            tvecs=np.array([r["tvecs"][i] for r, i in rows], dtype=np.float64).reshape((-1, 3)),
+            exact_positions=np.array([[np.nan, np.nan] if r["exact_positions"][i] is None else r["exact_positions"][i] for r, i in rows], dtype=np.float64).reshape((-1, 2)),
+        )
+
+def make_writer(path: str):
+    if path.endswith(".jsonl"):
+        return JsonlWriter(path)
+    if path.endswith(".npz"):
+        return NpzWriter(path)
+    raise Exception(f"VideoBatch: Output must be a .jsonl or .npz file, not {path}.")
+
+# Decodes a video and processes every frame on a process pool.
+# video_path can also be a folder of images, or an already opened FrameSource (e.g. a SyntheticSource).
+# game_factory builds a game from a camera yaml string in each worker; it must be importable (e.g. a class defined at module level).
+# Returns a dict of throughput stats.
+def process_video(video_path: str, game_factory, camera_yaml: str, output_path: str, workers: int = None, scale: float = 1.0, max_in_flight: int = None, on_result=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Bound how many decoded frames wait in memory; enough to keep every worker busy.
+    if max_in_flight is None:
+        max_in_flight = workers * 4
+
+    video = open_source(video_path) if isinstance(video_path, str) else video_path
+
+    writer = make_writer(output_path)
+    pending = deque()
+    frames = 0
+    processing_time = 0.0
+    start = time.perf_counter()
+
+    # Write out the oldest pending frame. Futures are kept in submission order, so results are written in frame order.
+    def finish_oldest():
+        nonlocal processing_time
+        _, result = pending.popleft().result()
+        processing_time += result["timings"]["total"]
+        writer.write(result)
+        if on_result is not None:
+            on_result(result)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(game_factory, camera_yaml, scale)) as pool:
+            while True:
+                ok, frame, timestamp = video.read_timestamped()
+                if not ok:
+                    break
+                pending.append(pool.submit(_process_frame, frames, timestamp, frame))
+                frames += 1
+
+                if len(pending) >= max_in_flight:
+                    finish_oldest()
+
+            while pending:
+                finish_oldest()
+    finally:
+        video.release()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "workers": workers,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "mean_frame_seconds": processing_time / frames if frames > 0 else 0.0,
+    }
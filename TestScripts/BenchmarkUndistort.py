@@ -0,0 +1,62 @@
+# python TestScripts/BenchmarkUndistort.py -c CameraCalibration/good_calibration.yaml -v ... -n 100
+# Times every GamesFrame undistort mode on the same frames from one camera, so each camera can use whichever is fastest.
+
+import cv2
+import argparse
+import sys
+sys.path.append(".")
+from Games.DummyGameTTT import *
+from CameraCalibration.auto_calibration import *
+from Helpers.FrameSource import open_source
+
+if __name__ == "__main__":
+    #ARGUMENT PARSE
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-c", "--calibration", type=str, default=None,
+        help="Path to the camera's calibration .yaml. Blank for a guess with no distortion")
+    ap.add_argument("-v", "--video", type=str, default="LIVE",
+        help="Path to video or folder of images, a camera index or /dev/video device. Blank for webcam")
+    ap.add_argument("-n", "--frames", type=int, default=100,
+        help="Number of frames to time each mode on")
+
+    args = vars(ap.parse_args())
+    name = args["video"]
+
+    video = open_source(name)
+    print(f"Reading {video}")
+
+    calibration = calibrations.for_capture(name, video) if args["calibration"] is None else calibrations.parse(args["calibration"])
+
+    # Every mode gets exactly the same frames.
+    frames = []
+    while len(frames) < args["frames"]:
+        ok, image = video.read()
+        if not ok:
+            break
+        frames.append(image)
+    video.release()
+    if len(frames) == 0:
+        raise Exception("No viable frames in video.")
+    print(f"Timing {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    # PROCESS FRAMES
+    results = {}
+    for mode in GamesFrame.UNDISTORT_MODES:
+        game = DummyGame(calibration, frame_options={"undistort": mode})
+        game.process_image(frames[0])    # Warm up (builds the maps for "maps").
+
+        stages = {}
+        markers = 0
+        for image in frames:
+            detections = game.gframe.process_image(image, compact=True)
+            markers += len(detections)
+            for stage, seconds in game.gframe.last_timings.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+
+        results[mode] = stages["total"] / len(frames)
+        breakdown = ", ".join(f"{stage} {1000 * seconds / len(frames):.2f}" for stage, seconds in stages.items() if stage != "total")
+        print(f"{mode:>6}: {1000 * results[mode]:.2f} ms/frame ({breakdown}), {markers / len(frames):.1f} markers/frame")
+
+    # PROCESS STATS
+    best = min(results, key=results.get)
+    print(f"Fastest for this camera: undistort=\"{best}\" (add it to the game's \"frame_options\")")
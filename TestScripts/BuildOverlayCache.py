@@ -0,0 +1,133 @@
+# python TestScripts/BuildOverlayCache.py -g "Tic Tac Toe" -w 4
+# python TestScripts/BuildOverlayCache.py -g "Pong Hau K'i" --uni-url http://localhost:8000/uni    (with TestScripts/OverlayServer.py running)
+# Fetches the overlay of every state reachable in a game ahead of time and stores them in the game's MovesCache file,
+# so no table waits on a live fetch. The states are walked breadth first from the game's start with its MoveGenerator.
+# It can be stopped at any point: the cache (and which states failed) is saved every --checkpoint seconds,
+# and running it again only fetches what is still missing.
+
+import os
+import re
+import sys
+import time
+import pickle
+import argparse
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+sys.path.append(".")
+from App.BoardFetcher import BoardFetcher
+from App.MoveGenerators import MOVE_GENERATORS
+
+# Every state reachable from the game's start, in breadth-first order. Stops after limit states if given.
+def reachable_states(moves, limit: int = None):
+    seen = set(moves.start_states())
+    order = list(seen)
+    frontier = deque(order)
+    while len(frontier) > 0 and (limit is None or len(order) < limit):
+        for state in moves.next_states(frontier.popleft()):
+            if state not in seen:
+                seen.add(state)
+                order.append(state)
+                frontier.append(state)
+    return order if limit is None else order[:limit]
+
+# States that failed in earlier runs, kept next to the cache since the cache itself leaves them out.
+def load_progress(path):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return {"failed": set()}
+
+def save_progress(path, progress):
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(progress, f)
+    os.replace(path + ".tmp", path)
+
+if __name__ == "__main__":
+    #ARGUMENT PARSE
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-g", "--game", type=str, required=True,
+        help="Name of the game in App/ProjectData")
+    ap.add_argument("-r", "--route", type=str, default=None,
+        help="The game's name in Uni's URLs. Blank for the game name in lowercase without spaces or punctuation")
+    ap.add_argument("--variant", type=str, default="regular",
+        help="The variant's name in Uni's URLs")
+    ap.add_argument("--uni-url", type=str, default=None,
+        help=f"Where Uni is running. Blank for {BoardFetcher.UNI_URL}")
+    ap.add_argument("-w", "--workers", type=int, default=4,
+        help="Number of browser sessions fetching at once")
+    ap.add_argument("-l", "--limit", type=int, default=None,
+        help="Only the first this many states, closest to the start first. Blank for every reachable state")
+    ap.add_argument("-c", "--checkpoint", type=float, default=60,
+        help="Save the cache every this many seconds. Each save rewrites the whole cache file, so not too often")
+    ap.add_argument("--retry-failed", action="store_true",
+        help="Fetch states that failed in earlier runs again")
+
+    args = vars(ap.parse_args())
+    game = args["game"]
+
+    if not os.path.exists(os.path.join("App", "ProjectData", game + ".json")):
+        raise Exception(f"No game called '{game}' in App/ProjectData.")
+    if game not in MOVE_GENERATORS:
+        raise Exception(f"'{game}' has no MoveGenerator. Games with one: {', '.join(MOVE_GENERATORS)}")
+    route = args["route"] or re.sub(r"[^a-z0-9]", "", game.lower())
+
+    # ENUMERATE STATES
+    start = time.time()
+    states = reachable_states(MOVE_GENERATORS[game], args["limit"])
+    print(f"{len(states)} states reachable in {game} (walked in {time.time() - start:.1f}s)")
+
+    # Only fetches from this script are pending, so it keeps at most max_pending going and fetch() never turns one down.
+    workers = args["workers"]
+    fetcher = BoardFetcher(route, args["variant"], workers, max_pending=workers * 2, uni_url=args["uni_url"])
+    progress_route = fetcher.cache_route + ".progress"
+    progress = load_progress(progress_route)
+    skipped = set() if args["retry_failed"] else progress["failed"]
+
+    todo = [state for state in states if fetcher.status(state) != BoardFetcher.READY and state not in skipped]
+    print(f"{len(states) - len(todo)} already done ({len(skipped)} failed before), {len(todo)} to fetch from {fetcher.base_url}")
+
+    # Saves everything fetched so far, so a stopped run carries on from here.
+    def checkpoint():
+        fetcher.write_cache()
+        with fetcher.lock:
+            failed = (skipped | fetcher.failed) - fetcher.board_cache.keys()
+        save_progress(progress_route, {"failed": failed})
+
+    # FETCH OVERLAYS
+    pending = {}
+    fetched = 0
+    start = time.time()
+    last_checkpoint = start
+
+    def collect(done):
+        global fetched, last_checkpoint
+        for future in done:
+            state = pending.pop(future)
+            if future.cancelled():
+                continue
+            fetched += 1
+            if fetcher.status(state) == BoardFetcher.FAILED:
+                print(f"No overlay for {state}")
+        if time.time() - last_checkpoint >= args["checkpoint"]:
+            checkpoint()
+            last_checkpoint = time.time()
+            rate = fetched / (last_checkpoint - start)
+            print(f"{fetched}/{len(todo)} fetched, {len(fetcher.failed)} failed, {rate:.1f}/s, about {(len(todo) - fetched) / rate:.0f}s left")
+
+    try:
+        for state in todo:
+            while len(pending) >= fetcher.max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[fetcher.fetch(state)] = state
+        while len(pending) > 0:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    except KeyboardInterrupt:
+        print("Stopping; run again to carry on.")
+    finally:
+        fetcher.close()
+        checkpoint()
+
+    # PROCESS STATS
+    print(f"Fetched {fetched} overlays ({len(fetcher.failed)} failed) in {time.time() - start:.1f}s")
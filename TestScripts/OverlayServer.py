@@ -0,0 +1,96 @@
+# python TestScripts/OverlayServer.py --port 8000 --delay 200
+# A stand-in for Uni's board-overlay pages, for trying BoardFetcher and BuildOverlayCache.py without Uni running:
+#   python TestScripts/BuildOverlayCache.py -g "Tic Tac Toe" --uni-url http://localhost:8000/uni
+# Serves /uni/games/<game>/variants/<variant>/<state>/board-overlay as a page whose JS puts an <img id="board-overlay">
+# picturing the state's cells in after --delay ms, like the real page. States that aren't "<turn>_<cells>" get a page with no overlay.
+
+import re
+import base64
+import argparse
+import math
+import cv2
+import numpy as np
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OVERLAY_PATH = re.compile(r"^/uni/games/([^/]+)/variants/([^/]+)/([^/]+)/board-overlay/?$")
+VALID_STATE = re.compile(r"^[12]_[^_]+$")
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{game} {state}</title></head>
+<body>
+<div id="root"></div>
+<script>
+setTimeout(function () {{
+    {script}
+}}, {delay});
+</script>
+</body>
+</html>
+"""
+
+# Draws a 512x512 transparent overlay with each cell's character in a grid (a square one if the cell count allows).
+def draw_overlay(board_state: str):
+    cells = board_state.split("_", 1)[1]
+    columns = math.isqrt(len(cells)) if math.isqrt(len(cells)) ** 2 == len(cells) else len(cells)
+    rows = math.ceil(len(cells) / columns)
+
+    image = np.zeros((512, 512, 4), dtype=np.uint8)
+    cell_w, cell_h = 512 / columns, 512 / rows
+    for i, cell in enumerate(cells):
+        x, y = i % columns, i // columns
+        top_left = (int(x * cell_w) + 4, int(y * cell_h) + 4)
+        bottom_right = (int((x + 1) * cell_w) - 4, int((y + 1) * cell_h) - 4)
+        cv2.rectangle(image, top_left, bottom_right, (255, 255, 255, 160), 2)
+        if cell != "-":
+            scale = min(cell_w, cell_h) / 40
+            (text_w, text_h), _ = cv2.getTextSize(cell, cv2.FONT_HERSHEY_SIMPLEX, scale, 3)
+            origin = (int((x + 0.5) * cell_w - text_w / 2), int((y + 0.5) * cell_h + text_h / 2))
+            cv2.putText(image, cell, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 200, 255, 255), 3)
+
+    return "data:image/png;base64," + base64.b64encode(cv2.imencode(".png", image)[1].tobytes()).decode()
+
+class OverlayHandler(BaseHTTPRequestHandler):
+    delay = 0
+
+    def do_GET(self):
+        match = OVERLAY_PATH.match(self.path)
+        if match is None:
+            self.send_error(404)
+            return
+
+        game, _, board_state = match.groups()
+        if VALID_STATE.match(board_state):
+            script = f'var image = document.createElement("img"); image.id = "board-overlay"; image.src = "{draw_overlay(board_state)}"; document.getElementById("root").appendChild(image);'
+        else:
+            script = 'document.getElementById("root").textContent = "Invalid board state";'
+
+        body = PAGE.format(game=game, state=board_state, script=script, delay=self.delay).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # One line per page would drown out BuildOverlayCache's progress.
+    def log_message(self, format, *args):
+        pass
+
+if __name__ == "__main__":
+    #ARGUMENT PARSE
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-p", "--port", type=int, default=8000,
+        help="Port to serve on")
+    ap.add_argument("-d", "--delay", type=int, default=200,
+        help="Milliseconds before a page's JS puts its overlay in")
+
+    args = vars(ap.parse_args())
+    OverlayHandler.delay = args["delay"]
+
+    server = ThreadingHTTPServer(("localhost", args["port"]), OverlayHandler)
+    print(f"Serving board overlays at http://localhost:{args['port']}/uni")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -9,18 +9,24 @@ import streamlit as st
 from Games.DummyGamePHK import DummyGame
 from CameraCalibration.auto_calibration import *
 from Helpers.StateEstimator import MajorityEstimator
+from Helpers.FrameGrabber import FrameGrabber
+from Helpers.FrameSource import open_source
+
+# Which camera to use: "LIVE" for the first one, an index such as "1", or a device path such as "/dev/video2".
+# CAMERA_OPTIONS are capture settings (width, height, fourcc, fps, buffer_size, backend); see Helpers/FrameSource.py.
+# A one-frame driver buffer keeps frames from arriving several frames late.
+CAMERA = "LIVE"
+CAMERA_OPTIONS = {"buffer_size": 1}
 
 ses = st.session_state
 
 # CAMERA & GAME
 if "camera" not in ses:
-    ses.camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    # auto calibration
-    _, image = ses.camera.read()
-    h, w = image.shape[:2]
-    yaml_str = get_calib_matrices(w, h, mode="yaml")
-    # yaml string done
-    ses.game = DummyGame(yaml_str)
+    ses.camera = open_source(CAMERA, **CAMERA_OPTIONS)
+    ses.game = DummyGame(calibrations.for_capture(CAMERA, ses.camera))
+
+    # Read frames on their own thread so processing always works on the newest one.
+    ses.grabber = FrameGrabber(ses.camera)
 
 # ONLINE WINDOW
 FRAME_WINDOW = st.image([ ])
@@ -35,8 +41,15 @@ estimator = MajorityEstimator()
 GRID = 4
 
 # PROCESS VIDEO
+if run:
+    ses.grabber.start()
+else:
+    ses.grabber.stop()
+
 while run:
-    _, image = ses.camera.read()
+    ok, image, captured_at = ses.grabber.read_timestamped()
+    if not ok:
+        continue
 
     pieces, anchors, reasons = ses.game.process_image(image)
     prefix = f"{len(anchors)} anchors spotted; {len(pieces)} pieces spotted  \n"
@@ -66,7 +79,7 @@ while run:
             board_str += board_rep[c][r]
 
     # Add board string to state estimator
-    estimator.seen_board_state(board_str)
+    estimator.seen_board_state(board_str, captured_at)
     
     # if len(estimator.queue) > MIN_FRAMES:
     pred_state = estimator.curr_board_state()
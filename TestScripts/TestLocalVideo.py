@@ -1,75 +1,109 @@
 # python TestScripts/TestLocalVideo.py -v ... -s ... -d ...
+# python TestScripts/TestLocalVideo.py -v ... -p 0.5    (find markers at half resolution, refine corners at full resolution)
+# python TestScripts/TestLocalVideo.py -v ... -b results.jsonl -w 8    (batch mode: no window, all cores)
+# python TestScripts/TestLocalVideo.py -v /dev/video2 --width 1920 --height 1080 --fourcc MJPG    (live camera with explicit capture settings)
+# python TestScripts/TestLocalVideo.py -v TestGraphics/TicTacToe -d 0    (folder of images; -v synthetic renders the board instead)
 
 import cv2
-import yaml
 import time
+import argparse
+from functools import partial
 import sys
 sys.path.append(".")
 from Games.DummyGameTTT import *
 from CameraCalibration.auto_calibration import *
+from Helpers.VideoBatch import process_video
+from Helpers.FrameSource import open_source, is_camera
 
-#ARGUMENT PARSE
-ap = argparse.ArgumentParser()
-ap.add_argument("-v", "--video", type=str, default="LIVE",
-	help="Path to video. Blank for webcam")
-ap.add_argument("-s", "--scale", type=float, default=1.0,
-	help="Scale factor s*(x,y) for frames")
-ap.add_argument("-d", "--delay", type=int, default=1,
-	help="Delay (ms) between frames shown")
+if __name__ == "__main__":
+    #ARGUMENT PARSE
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-v", "--video", type=str, default="LIVE",
+        help="Path to video or folder of images, a camera index or /dev/video device, or 'synthetic'. Blank for webcam")
+    ap.add_argument("-s", "--scale", type=float, default=1.0,
+        help="Scale factor s*(x,y) for frames")
+    ap.add_argument("-d", "--delay", type=int, default=1,
+        help="Delay (ms) between frames shown")
+    ap.add_argument("-b", "--batch", type=str, default=None,
+        help="Process the whole video on a process pool and write results to this .jsonl or .npz file")
+    ap.add_argument("-w", "--workers", type=int, default=None,
+        help="Worker processes for batch mode. Blank for one per core")
+    ap.add_argument("-p", "--pyramid", type=float, default=1.0,
+        help="Detect markers on frames shrunk by this factor, then refine corners at full resolution")
+    ap.add_argument("--width", type=int, default=None,
+        help="Camera frame width to request")
+    ap.add_argument("--height", type=int, default=None,
+        help="Camera frame height to request")
+    ap.add_argument("--fourcc", type=str, default=None,
+        help="Camera pixel format to request, e.g. MJPG or YUYV")
+    ap.add_argument("--buffer", type=int, default=1,
+        help="Frames the camera driver may queue up (fewer means less latency)")
 
-args = vars(ap.parse_args())
-name = args["video"]
-scale= args["scale"]
+    args = vars(ap.parse_args())
+    name = args["video"]
+    scale= args["scale"]
 
-# CAMERA WINDOW
-cv2.namedWindow(name, cv2.WINDOW_NORMAL)
-if name == "LIVE":
-    print("Accessing live camera...")
-    video = cv2.VideoCapture(0)
-else:
-    print("Processing video " + name)
-    video = cv2.VideoCapture(name)
+    if args["batch"] is not None and is_camera(name):
+        raise Exception("Batch mode needs a video, a folder of images or synthetic frames.")
 
-yaml_str = get_calib_matrices(cam=video)
+    # Pyramid detection keeps corners in the frame's own pixels, so it needs no calibration change.
+    make_game = partial(DummyGame, frame_options={"detection_scale": args["pyramid"]})
 
-# RESCALE CALIB
-if scale != 1.0:
-    calib = yaml.safe_load(yaml_str)
-    cam = calib["camera_matrix"]
-    cam[0][0] *= scale  # f_x
-    cam[1][1] *= scale  # f_y
-    cam[0][2] *= scale  # c_x
-    cam[1][2] *= scale  # c_y
-    yaml_str = yaml.dump(calib)
+    # FRAME SOURCE
+    if is_camera(name):
+        print("Accessing live camera...")
+        video = open_source(name, width=args["width"], height=args["height"], fourcc=args["fourcc"], buffer_size=args["buffer"])
+    elif name == "synthetic":
+        video = open_source(name, board_info=make_game(calibrations.get(name, 1280, 720)).gframe.board_info, frames=300, move_every=30)
+    else:
+        video = open_source(name)
+    print(f"Processing {video}")
 
-game = DummyGame(yaml_str)
-print(f"Starting instance of {game.name}")
+    # GamesFrame rescales the calibration itself when frames are resized.
+    calibration = calibrations.for_capture(name, video)
 
-# PROCESS VIDEO
-times = []
-while image is not None:
+    # BATCH MODE
+    if args["batch"] is not None:
+        stats = process_video(video, make_game, calibration, args["batch"], workers=args["workers"], scale=scale)
+        print(f"Wrote results to {args['batch']}")
+        print(f"Total time  : {stats['seconds']:.3f} seconds")
+        print(f"Total frames: {stats['frames']} frames")
+        print(f"Workers     : {stats['workers']}")
+        print(f"Throughput  : {stats['fps']:.3f} fps")
+        print(f"Per frame   : {stats['mean_frame_seconds']:.3f} s/frame (single worker)")
+        sys.exit(0)
 
-    start_time = time.time()    # TIMER START
-    _, image = video.read()
-    if scale != 1.0:
-        image = cv2.resize(image, None, fx=scale, fy=scale)
-    
-    pieces, anchors, _ = game.process_image(image)
-    for info in pieces + anchors:
-        info.put_summary_graphic(image)
-        info.put_bounds(image)
-    
-    cv2.imshow(name, image)
-    if cv2.waitKey(args["delay"]) & 0xFF == ord("q"):
-        break
-    times.append(time.time() - start_time)    # TIMER END
+    cv2.namedWindow(name, cv2.WINDOW_NORMAL)
+    game = make_game(calibration)
+    print(f"Starting instance of {game.name}")
 
-# PROCESS STATS
-if len(times) == 0:
-    raise Exception("No viable frames in video.")
-avg_time = sum(times) / len(times)
+    # PROCESS VIDEO
+    times = []
+    while True:
 
-print(f"Total time  : {sum(times):.3f} seconds")
-print(f"Total frames: {len(times):.3f} frames")
-print(f"Average time: {avg_time:.3f} s/frame")
-print(f"Average FPS : {1/avg_time:.3f} fps")
\ No newline at end of file
+        start_time = time.perf_counter()    # TIMER START
+        ok, image = video.read()
+        if not ok:
+            break
+        if scale != 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale)
+
+        pieces, anchors, _ = game.process_image(image)
+        for info in pieces + anchors:
+            info.put_summary_graphic(image)
+            info.put_bounds(image)
+
+        cv2.imshow(name, image)
+        if cv2.waitKey(args["delay"]) & 0xFF == ord("q"):
+            break
+        times.append(time.perf_counter() - start_time)    # TIMER END
+
+    # PROCESS STATS
+    if len(times) == 0:
+        raise Exception("No viable frames in video.")
+    avg_time = sum(times) / len(times)
+
+    print(f"Total time  : {sum(times):.3f} seconds")
+    print(f"Total frames: {len(times):.3f} frames")
+    print(f"Average time: {avg_time:.3f} s/frame")
+    print(f"Average FPS : {1/avg_time:.3f} fps")
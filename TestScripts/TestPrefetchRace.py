@@ -0,0 +1,75 @@
+# python TestScripts/TestPrefetchRace.py
+# Checks that a page asking for an overlay while the fetcher is full can't deadlock with a prefetch finishing at the same time:
+# the page's fetch() cancels a waiting prefetch while a pool worker, done with another prefetch, is starting the next one.
+# Both sides are slowed down at the point they used to block on each other's lock, so the race happens every run.
+# No browser is used; overlays are blank images.
+
+import sys
+import time
+import tempfile
+import threading
+import numpy as np
+sys.path.append(".")
+from App.BoardFetcher import BoardFetcher
+from App.PrefetchScheduler import PrefetchScheduler
+from App.MoveGenerators import MoveGenerator
+
+LOAD_TIME = 0.2
+WINDOW = 0.3
+
+class BlankFetcher(BoardFetcher):
+    CACHE_BASE_ROUTE = tempfile.mkdtemp()
+
+    @staticmethod
+    def make_driver():
+        return None
+
+    def load_overlay(self, driver, board_state):
+        time.sleep(LOAD_TIME)
+        return np.zeros((512, 512, 4), dtype=np.uint8)
+
+    # Holds the fetcher's lock for a while before cancelling a waiting prefetch.
+    def _drop_waiting(self):
+        time.sleep(WINDOW)
+        return super()._drop_waiting()
+
+class SlowScheduler(PrefetchScheduler):
+    # Holds the scheduler's lock for a while on a pool worker before asking the fetcher for statuses.
+    def _loading(self):
+        if threading.current_thread() is not threading.main_thread():
+            time.sleep(WINDOW)
+        return super()._loading()
+
+class ThreeMoves(MoveGenerator):
+    @classmethod
+    def next_states(cls, board_state):
+        return ["1_a", "1_b", "1_c"]
+
+if __name__ == "__main__":
+    # One browser and room for two fetches: "1_a" loads, "1_b" waits, "1_c" has to wait for room.
+    fetcher = BlankFetcher("race", "regular", workers=1, max_pending=2)
+    prefetcher = SlowScheduler(fetcher, ThreeMoves, max_prefetch=2)
+    prefetcher.update("1_start")
+    waiting = fetcher.in_flight["1_b"][1]
+
+    # "1_a" finishes at LOAD_TIME and its worker then holds the scheduler's lock for WINDOW. In the middle of that, the page
+    # fills the slot "1_a" left and asks for one more state, which makes the fetcher cancel "1_b" to make room.
+    time.sleep(LOAD_TIME + WINDOW / 3)
+    outcome = {}
+    def demand():
+        fetcher.fetch("1_other")
+        outcome["future"] = fetcher.fetch("1_demand")
+        outcome["image"] = outcome["future"].result(timeout=5)
+    page = threading.Thread(target=demand, daemon=True)
+    page.start()
+    page.join(timeout=10)
+
+    if page.is_alive():
+        print("FAILED: fetch() deadlocked with a finishing prefetch.")
+        sys.exit(1)
+    if outcome.get("image") is None or not waiting.cancelled():
+        print(f"FAILED: the waiting prefetch should be cancelled ({waiting}) and the new state loaded ({outcome}).")
+        sys.exit(1)
+
+    fetcher.close()
+    print("OK: the waiting prefetch was cancelled and the new state loaded without a deadlock.")